@@ -228,8 +228,18 @@ COST_PER_REQUEST_CENTS = int(os.environ.get("COST_PER_REQUEST_CENTS", "100"))
 
 # Image storage settings
 SAVE_REQUEST_IMAGES = os.environ.get("SAVE_REQUEST_IMAGES", "false").lower() == "true"
+# Also store customer uploads from /api/solve (requires SAVE_REQUEST_IMAGES)
+SAVE_SOLVE_API_IMAGES = os.environ.get("SAVE_SOLVE_API_IMAGES", "false").lower() == "true"
 MAX_SAVED_IMAGE_SIZE_MB = int(os.environ.get("MAX_SAVED_IMAGE_SIZE_MB", "10"))
 IMAGE_RETENTION_DAYS = int(os.environ.get("IMAGE_RETENTION_DAYS", "30"))
+# Keep saved image bytes in the default file storage (e.g. an S3 backend configured via
+# STORAGES) instead of the request_images table
+STORE_REQUEST_IMAGES_IN_STORAGE = (
+    os.environ.get("STORE_REQUEST_IMAGES_IN_STORAGE", "false").lower() == "true"
+)
+# Dedup hash for saved images: "sha256" or "xxh3_128" (needs the optional xxhash extra).
+# Switching only affects newly saved images; existing hashes are not recomputed.
+IMAGE_HASH_ALGO = os.environ.get("IMAGE_HASH_ALGO", "sha256")
 
 # Cache configuration (using local memory cache for zero-cost optimization)
 CACHES = {
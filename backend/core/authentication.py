@@ -57,6 +57,11 @@ class TokenCache:
                 self.cache.popitem(last=False)
             self.cache[key] = (user, token, time.time())
 
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self.lock:
+            self.cache.clear()
+
 
 class BearerTokenAuthentication(authentication.BaseAuthentication):
     """
@@ -118,42 +123,38 @@ class BearerTokenAuthentication(authentication.BaseAuthentication):
         """Authenticate a token and return the associated user and token object."""
         token_prefix = token[:12]  # tok_ + 8 chars
 
-        try:
-            # Fetch token with user in single query, only necessary fields
-            api_token = (
-                ApiToken.objects.select_related("user")
-                .only(
-                    "id",
-                    "token_hash",
-                    "revoked_at",
-                    "user__id",
-                    "user__email",
-                    "user__is_active",
-                    "user__email_verified_at",
-                )
-                .get(token_prefix=token_prefix)
+        # Fetch the active token with its user in a single query, only necessary fields.
+        # A prefix miss returns here without doing any Argon2 work.
+        api_token = (
+            ApiToken.objects.select_related("user")
+            .only(
+                "id",
+                "token_hash",
+                "revoked_at",
+                "user__id",
+                "user__email",
+                "user__is_active",
+                "user__email_verified_at",
             )
+            .filter(token_prefix=token_prefix, revoked_at__isnull=True)
+            .first()
+        )
+        if api_token is None:
+            return None, None
 
-            # Quick validation checks
-            if (
-                api_token.is_revoked
-                or not api_token.user.is_active
-                or not api_token.user.is_email_verified
-            ):
-                return None, None
-
-            # Verify token hash
-            ph = PasswordHasher()
-            try:
-                ph.verify(api_token.token_hash, token)
-            except VerifyMismatchError:
-                return None, None
-
-            return api_token.user, api_token
+        # Quick validation checks
+        if not api_token.user.is_active or not api_token.user.is_email_verified:
+            return None, None
 
-        except ApiToken.DoesNotExist:
+        # Verify token hash
+        ph = PasswordHasher()
+        try:
+            ph.verify(api_token.token_hash, token)
+        except VerifyMismatchError:
             return None, None
 
+        return api_token.user, api_token
+
     def _schedule_update_last_used(self, api_token: ApiToken) -> None:
         """
         Schedule async update of last_used timestamp.
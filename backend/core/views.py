@@ -9,6 +9,7 @@ Key optimizations:
 
 import logging
 import time
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
@@ -22,6 +23,7 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from usage.bulk_writer import image_writer
 from usage.models import RequestLog
 from usage.utils import get_or_create_current_billing_period
 
@@ -196,19 +198,14 @@ class SolveView(APIView):
                     error_code=error_code,
                     request_id=request_id,
                     result=str(result["result"]) if result else None,
+                    # The request_logs trigger adds this to the billing period totals
+                    cost_cents=app_settings.cost_per_request_cents,
                 )
 
-                # Update billing totals (single UPDATE query)
-                billing_period.total_requests = models.F("total_requests") + 1
-                billing_period.total_cost_cents = (
-                    models.F("total_cost_cents") + app_settings.cost_per_request_cents
-                )
-                billing_period.save(update_fields=["total_requests", "total_cost_cents"])
-
                 # Skip image saving in critical path
                 # This can be done asynchronously or conditionally
                 if settings.SAVE_REQUEST_IMAGES and self._should_save_image(image_bytes):
-                    self._schedule_image_save(request_log.id, image_bytes)
+                    self._schedule_image_save(request_log, image_bytes)
 
         except Exception as e:
             # Log but don't fail the request
@@ -219,18 +216,15 @@ class SolveView(APIView):
         max_size = settings.MAX_SAVED_IMAGE_SIZE_MB * 1024 * 1024
         return len(image_bytes) <= max_size
 
-    def _schedule_image_save(self, request_log_id: str, image_bytes: bytes) -> None:
+    def _schedule_image_save(self, request_log: RequestLog, image_bytes: bytes) -> None:
         """
         Schedule image save for async processing.
-        In production, push to task queue.
+        Off unless SAVE_SOLVE_API_IMAGES is set; queued images are bulk-inserted
+        by a background writer once the log commits.
         """
-        # For MVP, skip image saving in critical path
-        # In production: celery_app.send_task("save_request_image", args=[request_log_id, image_bytes])
-        pass
-
-
-# Import models here to avoid circular import
-from django.db import models
+        if not settings.SAVE_SOLVE_API_IMAGES:
+            return
+        transaction.on_commit(partial(image_writer.add, request_log, image_bytes))
 
 
 @api_view(["GET"])
@@ -129,20 +129,29 @@ class ApiToken(models.Model):
         return f"{self.user.email} - {self.name}"
 
     @classmethod
-    def generate_token(cls) -> tuple[str, str, str]:
-        """Generate a new API token.
+    def generate_token_value(cls) -> tuple[str, str]:
+        """Generate a new raw API token without hashing it.
 
         Returns:
-            tuple: (full_token, token_prefix, token_hash)
+            tuple: (full_token, token_prefix)
         """
-        # Generate 32 random bytes
-        secrets.token_bytes(32)
-        # Convert to base64url string
+        # Convert 32 random bytes to a base64url string
         full_token = secrets.token_urlsafe(32)
         # Get prefix (first 8 chars including 'tok_' prefix)
         token_with_prefix = f"tok_{full_token}"
         token_prefix = token_with_prefix[:12]  # tok_ + 8 chars
 
+        return token_with_prefix, token_prefix
+
+    @classmethod
+    def generate_token(cls) -> tuple[str, str, str]:
+        """Generate a new API token.
+
+        Returns:
+            tuple: (full_token, token_prefix, token_hash)
+        """
+        token_with_prefix, token_prefix = cls.generate_token_value()
+
         # Hash the full token
         ph = PasswordHasher()
         token_hash = ph.hash(token_with_prefix)
@@ -1,11 +1,14 @@
 import logging
 import time
 from datetime import timedelta
+from functools import partial
 
 from django.conf import settings
 from django.contrib.auth import login, logout
 from django.core.mail import send_mail
 from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
+from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.middleware.csrf import get_token
 from django.utils import timezone
 from rest_framework import status
@@ -20,7 +23,8 @@ from core.models import Settings
 from core.permissions import IsEmailVerified
 from core.services import openai_client
 from core.services.exceptions import OpenAIError
-from usage.models import BillingPeriod, RequestImage, RequestLog
+from usage.bulk_writer import image_writer
+from usage.models import BillingPeriod, RequestLog
 from usage.serializers import CurrentBillingPeriodSerializer
 from usage.utils import get_or_create_current_billing_period
 
@@ -309,27 +313,29 @@ class UsageSummaryView(APIView):
         week_ago = today - timedelta(days=7)
         month_start = today.replace(day=1)
 
-        # Today
-        today_count = RequestLog.objects.filter(user=request.user, request_ts__gte=today).count()
-
-        # Yesterday
-        yesterday_count = RequestLog.objects.filter(
-            user=request.user, request_ts__gte=yesterday, request_ts__lt=today
-        ).count()
-
-        # Last 7 days
-        last7_days_count = RequestLog.objects.filter(
-            user=request.user, request_ts__gte=week_ago
-        ).count()
-
-        # This month
-        this_month_count = RequestLog.objects.filter(
-            user=request.user, request_ts__gte=month_start
-        ).count()
-
-        # Get last request
-        last_request = RequestLog.objects.filter(user=request.user).order_by("-request_ts").first()
-        last_request_at = last_request.request_ts.isoformat() if last_request else None
+        # All window counts in one pass over the rows since the earliest window start
+        stats = RequestLog.objects.filter(
+            user=request.user, request_ts__gte=min(week_ago, month_start)
+        ).aggregate(
+            today=Count("id", filter=Q(request_ts__gte=today)),
+            yesterday=Count("id", filter=Q(request_ts__gte=yesterday, request_ts__lt=today)),
+            last7_days=Count("id", filter=Q(request_ts__gte=week_ago)),
+            this_month=Count("id", filter=Q(request_ts__gte=month_start)),
+            latest=Max("request_ts"),
+        )
+        today_count = stats["today"]
+        yesterday_count = stats["yesterday"]
+        last7_days_count = stats["last7_days"]
+        this_month_count = stats["this_month"]
+
+        # Get last request, looking further back only if there was none in the window
+        last_request_ts = stats["latest"]
+        if last_request_ts is None:
+            last_request = (
+                RequestLog.objects.filter(user=request.user).order_by("-request_ts").first()
+            )
+            last_request_ts = last_request.request_ts if last_request else None
+        last_request_at = last_request_ts.isoformat() if last_request_ts else None
 
         return Response(
             {
@@ -509,6 +515,8 @@ class TestSolveView(APIView):
                 status="success",
                 request_id=getattr(request, "request_id", None),
                 result=str(result["result"]),  # Store the result
+                # Test requests are also billed; the request_logs trigger updates the totals
+                cost_cents=app_settings.cost_per_request_cents,
             )
 
             # Save image if feature is enabled
@@ -524,8 +532,9 @@ class TestSolveView(APIView):
                             if content_type:
                                 mime_type = content_type
 
-                        RequestImage.create_from_bytes(
-                            request_log=request_log, image_bytes=image_bytes, mime_type=mime_type
+                        # Queued and bulk-inserted off the request thread once committed
+                        transaction.on_commit(
+                            partial(image_writer.add, request_log, image_bytes, mime_type)
                         )
                     except Exception as e:
                         # Log error but don't fail the request
@@ -533,11 +542,6 @@ class TestSolveView(APIView):
                             f"Failed to save image for test request {getattr(request, 'request_id', 'unknown')}: {e}"
                         )
 
-            # Update billing period totals (test requests are also billed)
-            billing_period.total_requests += 1
-            billing_period.total_cost_cents += app_settings.cost_per_request_cents
-            billing_period.save(update_fields=["total_requests", "total_cost_cents", "updated_at"])
-
             # Return response
             return Response(
                 {
@@ -569,6 +573,8 @@ class TestSolveView(APIView):
                 error_code=e.error_code.value,
                 request_id=getattr(request, "request_id", None),
                 result=None,
+                # Charge even for errors
+                cost_cents=app_settings.cost_per_request_cents,
             )
 
             # Save image even for errors if feature is enabled
@@ -582,19 +588,15 @@ class TestSolveView(APIView):
                             if content_type:
                                 mime_type = content_type
 
-                        RequestImage.create_from_bytes(
-                            request_log=request_log, image_bytes=image_bytes, mime_type=mime_type
+                        # Queued and bulk-inserted off the request thread once committed
+                        transaction.on_commit(
+                            partial(image_writer.add, request_log, image_bytes, mime_type)
                         )
                     except Exception as save_error:
                         logger.error(
                             f"Failed to save image for failed test request {getattr(request, 'request_id', 'unknown')}: {save_error}"
                         )
 
-            # Update billing period totals (charge even for errors)
-            billing_period.total_requests += 1
-            billing_period.total_cost_cents += app_settings.cost_per_request_cents
-            billing_period.save(update_fields=["total_requests", "total_cost_cents", "updated_at"])
-
             # Return error
             return Response(
                 {"detail": str(e), "code": e.error_code.value},
@@ -0,0 +1,484 @@
+"""
+Tests for billing periods and their totals.
+"""
+
+import io
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from usage.models import BillingPeriod, RequestLog
+from usage.serializers import CurrentBillingPeriodSerializer
+from usage.utils import get_current_period_bounds, get_or_create_current_billing_period
+
+User = get_user_model()
+
+# Where each backend lists the triggers created by migration 0011
+TRIGGER_LOOKUP_SQL = {
+    "sqlite": "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name = %s",
+    "postgresql": "SELECT tgname FROM pg_trigger WHERE tgname = %s",
+}
+
+
+def build_request_log(user, billing_period=None, cost_cents=100):
+    """Build an unsaved successful request log for user."""
+    return RequestLog(
+        user=user,
+        billing_period=billing_period,
+        duration_ms=100,
+        request_bytes=10,
+        response_bytes=5,
+        status="success",
+        request_id=uuid.uuid4(),
+        cost_cents=cost_cents,
+    )
+
+
+def create_period(user, month, **fields):
+    """Create a billing period for the given month of 2025."""
+    return BillingPeriod.objects.create(
+        user=user,
+        period_start=date(2025, month, 1),
+        period_end=date(2025, month, 28),
+        total_cost_cents=month * 100,
+        **fields,
+    )
+
+
+class BillingTotalsTriggerTestCase(TestCase):
+    """Test that the request_logs insert trigger maintains billing period totals."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="billing@example.com")
+
+    def setUp(self):
+        """Set up per-test state."""
+        self.period = BillingPeriod.objects.create(
+            user=self.user, period_start=date(2025, 3, 1), period_end=date(2025, 3, 31)
+        )
+
+    def assertTotals(self, total_requests, total_cost_cents):
+        self.period.refresh_from_db()
+        self.assertEqual(
+            (self.period.total_requests, self.period.total_cost_cents),
+            (total_requests, total_cost_cents),
+        )
+
+    def test_trigger_exists_after_migrate(self):
+        """Migrations that rebuild tables on SQLite must leave the trigger in place."""
+        if connection.vendor not in TRIGGER_LOOKUP_SQL:
+            self.skipTest(f"No billing totals trigger on {connection.vendor}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(TRIGGER_LOOKUP_SQL[connection.vendor], ["request_logs_billing_totals"])
+            self.assertIsNotNone(cursor.fetchone())
+
+    def test_create_adds_to_totals(self):
+        """A created request log adds one request and its cost to its period."""
+        build_request_log(self.user, self.period, cost_cents=100).save()
+        build_request_log(self.user, self.period, cost_cents=25).save()
+
+        self.assertTotals(2, 125)
+
+    def test_bulk_create_adds_to_totals(self):
+        """bulk_create fires the trigger for every inserted row."""
+        RequestLog.objects.bulk_create(
+            [build_request_log(self.user, self.period, cost_cents=10) for _ in range(5)]
+        )
+
+        self.assertTotals(5, 50)
+
+    def test_log_without_period_is_ignored(self):
+        """Request logs without a billing period leave every period untouched."""
+        build_request_log(self.user, cost_cents=100).save()
+        RequestLog.objects.bulk_create([build_request_log(self.user, cost_cents=100)])
+
+        self.assertTotals(0, 0)
+
+    def test_reconcile_fixes_drifted_period(self):
+        """reconcile_billing_totals --fix rewrites totals edited behind the trigger's back."""
+        RequestLog.objects.bulk_create(
+            [build_request_log(self.user, self.period, cost_cents=100) for _ in range(3)]
+        )
+        BillingPeriod.objects.filter(pk=self.period.pk).update(
+            total_requests=42, total_cost_cents=1
+        )
+
+        out = io.StringIO()
+        call_command("reconcile_billing_totals", stdout=out)
+        self.assertIn("1 billing periods drifted", out.getvalue())
+        self.assertTotals(42, 1)
+
+        call_command("reconcile_billing_totals", fix=True, stdout=io.StringIO())
+        self.assertTotals(3, 300)
+
+        out = io.StringIO()
+        call_command("reconcile_billing_totals", stdout=out)
+        self.assertIn("All billing period totals match", out.getvalue())
+
+
+class BillingPeriodBulkStatusTestCase(TestCase):
+    """Test the queryset-level payment status updates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="status@example.com")
+        cls.paid_at = timezone.now()
+        cls.current = create_period(cls.user, 6, is_current=True)
+        cls.pending = create_period(cls.user, 1)
+        cls.overdue = create_period(cls.user, 2, payment_status="overdue")
+        cls.paid = create_period(
+            cls.user, 3, payment_status="paid", paid_at=cls.paid_at, paid_amount_cents=1
+        )
+        cls.waived = create_period(cls.user, 4, payment_status="waived")
+
+    def statuses(self):
+        return dict(BillingPeriod.objects.values_list("period_start__month", "payment_status"))
+
+    def assertPaidHavePayment(self):
+        self.assertFalse(
+            BillingPeriod.objects.filter(payment_status="paid")
+            .filter(Q(paid_at__isnull=True) | Q(paid_amount_cents__isnull=True))
+            .exists()
+        )
+
+    def test_bulk_mark_as_paid(self):
+        """Only closed pending or overdue periods are paid, at their total cost."""
+        count = BillingPeriod.bulk_mark_as_paid(BillingPeriod.objects.all(), reference="INV-1")
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            self.statuses(), {6: "pending", 1: "paid", 2: "paid", 3: "paid", 4: "waived"}
+        )
+        self.assertPaidHavePayment()
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.paid_amount_cents, 100)
+        self.assertEqual(self.pending.payment_reference, "INV-1")
+        self.paid.refresh_from_db()
+        self.assertEqual((self.paid.paid_at, self.paid.paid_amount_cents), (self.paid_at, 1))
+
+    def test_bulk_mark_as_overdue(self):
+        """Current and paid periods are never marked overdue."""
+        count = BillingPeriod.bulk_mark_as_overdue(BillingPeriod.objects.all())
+
+        self.assertEqual(count, 3)
+        self.assertEqual(
+            self.statuses(), {6: "pending", 1: "overdue", 2: "overdue", 3: "paid", 4: "overdue"}
+        )
+        self.assertPaidHavePayment()
+
+    def test_bulk_mark_as_waived(self):
+        """Current, paid and already waived periods are skipped."""
+        count = BillingPeriod.bulk_mark_as_waived(BillingPeriod.objects.all(), notes="Credit")
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            self.statuses(), {6: "pending", 1: "waived", 2: "waived", 3: "paid", 4: "waived"}
+        )
+        self.assertPaidHavePayment()
+
+    def test_filtered_queryset_is_respected(self):
+        """Periods outside the given queryset are left alone."""
+        count = BillingPeriod.bulk_mark_as_paid(BillingPeriod.objects.filter(pk=self.overdue.pk))
+
+        self.assertEqual(count, 1)
+        self.assertEqual(self.statuses()[1], "pending")
+
+
+class BillingPeriodAdminActionsTestCase(TestCase):
+    """Test the billing period admin bulk actions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.admin_user = User.objects.create(
+            email="admin@example.com", is_staff=True, is_superuser=True
+        )
+        cls.current = create_period(cls.admin_user, 6, is_current=True)
+        cls.pending = create_period(cls.admin_user, 1)
+        cls.paid = create_period(
+            cls.admin_user, 3, payment_status="paid", paid_at=timezone.now(), paid_amount_cents=1
+        )
+
+    def setUp(self):
+        """Set up per-test state."""
+        self.client.force_login(self.admin_user)
+
+    def run_action(self, action):
+        return self.client.post(
+            reverse("admin:usage_billingperiod_changelist"),
+            {
+                "action": action,
+                "_selected_action": [
+                    str(period.pk) for period in (self.current, self.pending, self.paid)
+                ],
+            },
+            follow=True,
+        )
+
+    def test_actions_skip_ineligible_periods(self):
+        """Each action reports and updates only the periods it may change."""
+        for action, status, count in [
+            ("mark_as_overdue", "overdue", 1),
+            ("mark_as_paid", "paid", 1),
+            ("mark_as_waived", "waived", 0),
+        ]:
+            with self.subTest(action=action):
+                response = self.run_action(action)
+
+                self.assertContains(response, f"{count} billing periods marked as {status}.")
+                self.current.refresh_from_db()
+                self.assertEqual(self.current.payment_status, "pending")
+                self.paid.refresh_from_db()
+                self.assertEqual(self.paid.paid_amount_cents, 1)
+
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.payment_status, "paid")
+        self.assertEqual(self.pending.paid_amount_cents, 100)
+        self.assertIsNotNone(self.pending.paid_at)
+
+
+class MarkOverduePeriodsTestCase(TestCase):
+    """Test the mark_overdue_periods management command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="overdue@example.com")
+        cls.stale = create_period(cls.user, 1)
+        cls.current = create_period(cls.user, 2, is_current=True)
+        cls.paid = create_period(
+            cls.user, 3, payment_status="paid", paid_at=timezone.now(), paid_amount_cents=1
+        )
+        recent_end = timezone.now().date() - timedelta(days=5)
+        cls.recent = BillingPeriod.objects.create(
+            user=cls.user, period_start=recent_end.replace(day=1), period_end=recent_end
+        )
+
+    def test_only_stale_pending_periods_become_overdue(self):
+        """Current, paid and recently closed periods keep their status."""
+        out = io.StringIO()
+        call_command("mark_overdue_periods", days=30, stdout=out)
+
+        self.assertIn(f"Marked {self.user.email} - 2025-01 - overdue as overdue", out.getvalue())
+        self.assertIn("Marked 1 billing periods as overdue", out.getvalue())
+        self.assertEqual(
+            dict(BillingPeriod.objects.values_list("pk", "payment_status")),
+            {
+                self.stale.pk: "overdue",
+                self.current.pk: "pending",
+                self.paid.pk: "paid",
+                self.recent.pk: "pending",
+            },
+        )
+
+
+class CreateBillingPeriodsTestCase(TestCase):
+    """Test the create_billing_periods management command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.new_user, cls.flagged_user, cls.inactive_user = User.objects.bulk_create(
+            [
+                User(email="new@example.com"),
+                User(email="flagged@example.com"),
+                User(email="inactive@example.com", is_active=False),
+            ]
+        )
+        cls.period_start, cls.period_end = get_current_period_bounds()
+
+    def run_command(self):
+        out = io.StringIO()
+        call_command("create_billing_periods", stdout=out)
+        return out.getvalue()
+
+    def test_creates_missing_current_periods(self):
+        """Active users without a period for this month get one; stale ones are retired."""
+        stale = create_period(self.new_user, 1, is_current=True)
+
+        output = self.run_command()
+
+        self.assertIn("Processed 2 users (2 attempted, 0 updated)", output)
+        self.assertEqual(
+            set(
+                BillingPeriod.objects.filter(is_current=True).values_list(
+                    "user_id", "period_start", "period_end"
+                )
+            ),
+            {
+                (self.new_user.pk, self.period_start, self.period_end),
+                (self.flagged_user.pk, self.period_start, self.period_end),
+            },
+        )
+        stale.refresh_from_db()
+        self.assertFalse(stale.is_current)
+
+    def test_reflags_existing_period(self):
+        """An existing period for this month is flagged current instead of recreated."""
+        existing = BillingPeriod.objects.create(
+            user=self.flagged_user, period_start=self.period_start, period_end=self.period_end
+        )
+
+        output = self.run_command()
+
+        self.assertIn("Processed 2 users (1 attempted, 1 updated)", output)
+        existing.refresh_from_db()
+        self.assertTrue(existing.is_current)
+        self.assertEqual(BillingPeriod.objects.filter(user=self.flagged_user).count(), 1)
+
+    def test_rerun_creates_nothing(self):
+        """A second run finds every period in place."""
+        self.run_command()
+
+        self.assertIn("Processed 2 users (0 attempted, 0 updated)", self.run_command())
+        self.assertEqual(BillingPeriod.objects.count(), 2)
+
+
+class CurrentBillingPeriodCacheTestCase(TestCase):
+    """Test the cache in front of get_or_create_current_billing_period."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="cached@example.com")
+
+    def setUp(self):
+        """Set up per-test state."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.period_start, _ = get_current_period_bounds()
+        self.cache_key = f"bp:cur:{self.user.pk}:{self.period_start:%Y-%m}"
+
+    def test_miss_creates_and_caches_period(self):
+        """The first call creates this month's period and caches its id."""
+        period = get_or_create_current_billing_period(self.user)
+
+        self.assertTrue(period.is_current)
+        self.assertEqual(period.period_start, self.period_start)
+        self.assertEqual(cache.get(self.cache_key), period.pk)
+
+    def test_hit_loads_cached_period_in_one_query(self):
+        """A cached id is resolved with a single SELECT."""
+        period = get_or_create_current_billing_period(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_or_create_current_billing_period(self.user), period)
+
+    def test_deleted_period_is_recreated(self):
+        """A cached id whose row was deleted falls back to creating a new period."""
+        stale = get_or_create_current_billing_period(self.user)
+        stale.delete()
+
+        period = get_or_create_current_billing_period(self.user)
+
+        self.assertNotEqual(period.pk, stale.pk)
+        self.assertTrue(BillingPeriod.objects.filter(pk=period.pk, is_current=True).exists())
+        self.assertEqual(cache.get(self.cache_key), period.pk)
+
+    def test_retired_period_is_reflagged(self):
+        """A cached period that lost its current flag is flagged again, not returned as is."""
+        period = get_or_create_current_billing_period(self.user)
+        BillingPeriod.objects.filter(pk=period.pk).update(is_current=False)
+
+        self.assertTrue(get_or_create_current_billing_period(self.user).is_current)
+        period.refresh_from_db()
+        self.assertTrue(period.is_current)
+
+    def test_other_users_cached_id_is_ignored(self):
+        """A cached id pointing at another user's period is not returned."""
+        other_user = User.objects.create(email="other-cached@example.com")
+        other_period = get_or_create_current_billing_period(other_user)
+        cache.set(self.cache_key, other_period.pk)
+
+        period = get_or_create_current_billing_period(self.user)
+
+        self.assertEqual(period.user_id, self.user.pk)
+        self.assertEqual(cache.get(self.cache_key), period.pk)
+
+
+MONTH_NAMES = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+
+
+class BillingPeriodLabelTestCase(TestCase):
+    """Test the database-generated period_label column."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="label@example.com")
+
+    def test_label_is_month_name_and_year(self):
+        """Every month maps to its English name followed by the year."""
+        BillingPeriod.objects.bulk_create(
+            [
+                BillingPeriod(
+                    user=self.user,
+                    period_start=date(2025, month, 1),
+                    period_end=date(2025, month, 28),
+                )
+                for month in range(1, 13)
+            ]
+        )
+
+        labels = BillingPeriod.objects.order_by("period_start").values_list(
+            "period_label", flat=True
+        )
+
+        self.assertEqual(list(labels), [f"{month} 2025" for month in MONTH_NAMES])
+
+    def test_label_is_loaded_after_save(self):
+        """The generated value is available on a saved instance after a refresh."""
+        period = create_period(self.user, 12)
+
+        period.refresh_from_db()
+
+        self.assertEqual(period.period_label, "December 2025")
+
+
+class CurrentBillingPeriodSerializerTestCase(TestCase):
+    """Test the current billing period summary serializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="summary@example.com")
+        cls.period = create_period(cls.user, 5)
+
+    def test_last_request_at_is_latest_log(self):
+        """last_request_at is the newest request log of the period, or None without any."""
+        self.assertIsNone(CurrentBillingPeriodSerializer(self.period).data["last_request_at"])
+
+        now = timezone.now()
+        logs = [build_request_log(self.user, self.period) for _ in range(3)]
+        for offset, log in enumerate(logs):
+            log.request_ts = now - timedelta(hours=offset)
+        RequestLog.objects.bulk_create(logs)
+
+        self.assertEqual(
+            CurrentBillingPeriodSerializer(self.period).data["last_request_at"], now.isoformat()
+        )
@@ -0,0 +1,459 @@
+"""
+Tests for stored request images.
+"""
+
+import io
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.models import RestrictedError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.views import SolveView
+from usage.bulk_writer import BufferedImageWriter
+from usage.models import RequestImage, RequestLog
+
+User = get_user_model()
+
+
+def create_request_log(user, duration_ms=100, status="success"):
+    """Create a minimal request log for user."""
+    return RequestLog.objects.create(
+        user=user,
+        duration_ms=duration_ms,
+        request_bytes=10,
+        response_bytes=5,
+        status=status,
+        request_id=uuid.uuid4(),
+    )
+
+
+class RequestImageAdminRawViewTestCase(TestCase):
+    """Test the admin view that serves stored image bytes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.admin_user = User.objects.create(
+            email="admin@example.com", is_staff=True, is_superuser=True
+        )
+
+    def setUp(self):
+        """Set up per-test state."""
+        self.client.force_login(self.admin_user)
+
+    def get_raw(self, image, query=""):
+        url = reverse("admin:usage_requestimage_raw", args=[image.id])
+        return self.client.get(url + query)
+
+    def test_html_row_is_served_as_download(self):
+        """A row stored with text/html must not be rendered on the admin origin."""
+        payload = b"<html><script>alert(document.cookie)</script></html>"
+        image = RequestImage.create_from_bytes(
+            create_request_log(self.admin_user), payload, mime_type="text/html"
+        )
+
+        for query in ("", "?thumbnail=1"):
+            with self.subTest(query=query):
+                response = self.get_raw(image, query)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "application/octet-stream")
+                self.assertTrue(response["Content-Disposition"].startswith("attachment"))
+                self.assertEqual(response["Content-Security-Policy"], "sandbox")
+
+    def test_raster_row_is_served_inline(self):
+        """Allow-listed image types keep their MIME type."""
+        image = RequestImage.create_from_bytes(
+            create_request_log(self.admin_user), b"\xff\xd8\xff\xe0jpeg", mime_type="image/jpeg"
+        )
+
+        response = self.get_raw(image)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertNotIn("Content-Disposition", response)
+        self.assertEqual(response["Content-Security-Policy"], "sandbox")
+
+
+class RequestImageDeduplicationTestCase(TestCase):
+    """Test that repeated images are stored once per user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user, cls.other_user = User.objects.bulk_create(
+            [User(email="user@example.com"), User(email="other@example.com")]
+        )
+
+    def create_image(self, image_bytes, user=None):
+        return RequestImage.create_from_bytes(create_request_log(user or self.user), image_bytes)
+
+    def test_link_duplicates_within_user(self):
+        """A repeat of a stored image points at the first copy and drops its bytes."""
+        canonical = self.create_image(b"same bytes")
+        duplicate = self.create_image(b"same bytes")
+        other_user_copy = self.create_image(b"same bytes", user=self.other_user)
+
+        duplicate.refresh_from_db()
+        other_user_copy.refresh_from_db()
+        self.assertEqual(duplicate.canonical_image_id, canonical.id)
+        self.assertEqual(bytes(duplicate.image_data), b"")
+        self.assertIsNone(other_user_copy.canonical_image_id)
+
+    def test_link_duplicates_within_batch(self):
+        """The first occurrence in an unsaved batch becomes the canonical copy."""
+        images = [
+            RequestImage.build_from_bytes(create_request_log(self.user), b"batch bytes")
+            for _ in range(3)
+        ]
+
+        RequestImage.link_duplicates(images)
+
+        self.assertIsNone(images[0].canonical_image_id)
+        self.assertEqual([image.canonical_image_id for image in images[1:]], [images[0].id] * 2)
+
+    def test_get_image_bytes_follows_canonical(self):
+        """Duplicates return the canonical copy's bytes."""
+        self.create_image(b"payload")
+        duplicate = self.create_image(b"payload")
+
+        image = RequestImage.objects.get(pk=duplicate.pk)
+
+        self.assertEqual(image.get_image_bytes(), b"payload")
+
+    def use_file_storage(self):
+        """Store image bytes in a throwaway MEDIA_ROOT for the rest of the test."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            STORE_REQUEST_IMAGES_IN_STORAGE=True, MEDIA_ROOT=media_root
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_get_image_bytes_from_storage(self):
+        """Images kept in file storage are read back from the stored object."""
+        self.use_file_storage()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stored = self.create_image(b"stored payload")
+        image = RequestImage.objects.get(pk=stored.pk)
+
+        self.assertEqual(bytes(image.image_data), b"")
+        self.assertEqual(image.get_image_bytes(), b"stored payload")
+
+    def test_storage_upload_waits_for_commit(self):
+        """A rolled back image leaves no object behind in storage."""
+        self.use_file_storage()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            image = self.create_image(b"not committed yet")
+
+        self.assertFalse(default_storage.exists(image.image_file.name))
+        self.assertEqual(len(callbacks), 1)
+
+    def test_concurrent_upload_keeps_content_addressed_name(self):
+        """If another writer stores the object first, no suffixed copy is left behind."""
+        self.use_file_storage()
+        image = RequestImage.build_from_bytes(create_request_log(self.user), b"raced")
+        name = image.image_file.name
+
+        # Storage hands back a suffixed name when the object appeared after exists()
+        with (
+            patch.object(default_storage, "save", return_value=f"{name}_abc") as save,
+            patch.object(default_storage, "delete") as delete,
+        ):
+            RequestImage.store_files([image])
+
+        save.assert_called_once()
+        delete.assert_called_once_with(f"{name}_abc")
+        self.assertEqual(image.image_file.name, name)
+
+    def test_admin_delete_removes_unused_storage_object(self):
+        """Admin deletes remove storage objects that no remaining row uses."""
+        self.use_file_storage()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = self.create_image(b"admin stored")
+        admin_user = User.objects.create(
+            email="admin@example.com", is_staff=True, is_superuser=True
+        )
+        self.client.force_login(admin_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("admin:usage_requestimage_delete", args=[image.id]), {"post": "yes"}
+            )
+
+        self.assertFalse(default_storage.exists(image.image_file.name))
+
+    def test_promote_duplicates_keeps_bytes(self):
+        """Deleting a canonical image hands its bytes to the oldest duplicate."""
+        canonical = self.create_image(b"shared")
+        heir = self.create_image(b"shared")
+        other = self.create_image(b"shared")
+
+        doomed = RequestImage.objects.filter(pk=canonical.pk)
+        self.assertEqual(RequestImage.promote_duplicates(doomed), 1)
+        doomed.delete()
+
+        heir = RequestImage.objects.get(pk=heir.pk)
+        other = RequestImage.objects.get(pk=other.pk)
+        self.assertIsNone(heir.canonical_image_id)
+        self.assertEqual(heir.get_image_bytes(), b"shared")
+        self.assertEqual(other.canonical_image_id, heir.id)
+        self.assertEqual(other.get_image_bytes(), b"shared")
+
+    def test_canonical_delete_without_promotion_is_refused(self):
+        """A canonical image with surviving duplicates cannot be deleted directly."""
+        canonical = self.create_image(b"guarded")
+        self.create_image(b"guarded")
+
+        with self.assertRaises(RestrictedError):
+            RequestImage.objects.filter(pk=canonical.pk).delete()
+
+    def test_user_delete_cascades_over_duplicates(self):
+        """Deleting a user removes canonical images together with their duplicates."""
+        self.create_image(b"cascade", user=self.other_user)
+        self.create_image(b"cascade", user=self.other_user)
+
+        user_id = self.other_user.pk
+        self.other_user.delete()
+
+        self.assertFalse(RequestImage.objects.filter(request_log__user_id=user_id).exists())
+
+    def test_admin_delete_promotes_duplicate(self):
+        """Deleting a canonical image from the admin keeps its duplicates readable."""
+        canonical = self.create_image(b"admin shared")
+        duplicate = self.create_image(b"admin shared")
+        admin_user = User.objects.create(
+            email="admin@example.com", is_staff=True, is_superuser=True
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.post(
+            reverse("admin:usage_requestimage_delete", args=[canonical.id]), {"post": "yes"}
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(RequestImage.objects.filter(pk=canonical.pk).exists())
+        duplicate = RequestImage.objects.get(pk=duplicate.pk)
+        self.assertEqual(duplicate.get_image_bytes(), b"admin shared")
+
+    def test_cleanup_keeps_canonical_of_retained_duplicates(self):
+        """cleanup_old_images keeps old canonical images that newer duplicates rely on."""
+        old = timezone.now() - timedelta(days=60)
+        kept_canonical = self.create_image(b"still referenced")
+        retained_duplicate = self.create_image(b"still referenced")
+        expired = self.create_image(b"expired")
+        expired_duplicate = self.create_image(b"expired")
+        RequestImage.objects.filter(
+            pk__in=[kept_canonical.pk, expired.pk, expired_duplicate.pk]
+        ).update(created_at=old)
+
+        call_command("cleanup_old_images", days=30, stdout=io.StringIO())
+
+        self.assertEqual(
+            set(RequestImage.objects.values_list("pk", flat=True)),
+            {kept_canonical.pk, retained_duplicate.pk},
+        )
+        retained_duplicate = RequestImage.objects.get(pk=retained_duplicate.pk)
+        self.assertEqual(retained_duplicate.get_image_bytes(), b"still referenced")
+
+
+class ImagePerformanceStatsTestCase(TestCase):
+    """Test the admin image performance stats endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.admin_user = User.objects.create(
+            email="admin@example.com", is_staff=True, is_superuser=True
+        )
+        for duration_ms, status, size_kb in [
+            (100, "success", 1),
+            (300, "success", 2),
+            (200, "error", 3),
+        ]:
+            RequestImage.create_from_bytes(
+                create_request_log(cls.admin_user, duration_ms, status), bytes(size_kb * 1024)
+            )
+
+    def setUp(self):
+        """Set up per-test state."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(self.admin_user)
+
+    def get_stats(self):
+        return self.client.get(reverse("image_performance_stats"))
+
+    def test_aggregates(self):
+        """Totals, status counts and groupings come from one pass over the saved images."""
+        response = self.get_stats()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertEqual(
+            response.data["overall_stats"],
+            {
+                "total_requests": 3,
+                "success_count": 2,
+                "error_count": 1,
+                "avg_duration_ms": 200.0,
+                "avg_image_size_kb": 2.0,
+                "total_storage_mb": 0.01,
+                "success_rate": 66.67,
+            },
+        )
+        self.assertEqual(
+            response.data["by_dimensions"],
+            [
+                {
+                    "dimensions": "Unknown",
+                    "count": 3,
+                    "avg_duration_ms": 200.0,
+                    "avg_size_kb": 2.0,
+                    "error_rate": 33.33,
+                }
+            ],
+        )
+        self.assertEqual(
+            response.data["by_mime_type"],
+            [{"mime_type": "image/jpeg", "count": 3, "total_size_mb": 0.01, "avg_size_kb": 2.0}],
+        )
+        self.assertEqual(
+            [(day["count"], day["error_count"]) for day in response.data["recent_trends"]],
+            [(3, 1)],
+        )
+
+    def test_second_call_is_served_from_cache(self):
+        """Images saved within the cache timeout do not show up until it expires."""
+        first = self.get_stats()
+        RequestImage.create_from_bytes(create_request_log(self.admin_user), b"late")
+
+        with patch("usage.views._compute_image_performance_stats") as compute:
+            second = self.get_stats()
+
+        compute.assert_not_called()
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.data["overall_stats"]["total_requests"], 3)
+
+
+class BufferedImageWriterTestCase(TestCase):
+    """Test the buffered image writer without its background thread."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="writer@example.com")
+
+    def setUp(self):
+        """Set up per-test state."""
+        patcher = patch.object(BufferedImageWriter, "_ensure_thread")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_flush_writes_queued_images(self):
+        """flush() inserts every queued image and links repeats."""
+        writer = BufferedImageWriter()
+        logs = [create_request_log(self.user) for _ in range(3)]
+        writer.add(logs[0], b"first")
+        writer.add(logs[1], b"first")
+        writer.add(logs[2], b"second", mime_type="image/png")
+
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(writer.flush(), 0)
+
+        images = {image.request_log_id: image for image in RequestImage.objects.all()}
+        self.assertEqual(images[logs[1].id].canonical_image_id, images[logs[0].id].id)
+        self.assertEqual(images[logs[1].id].get_image_bytes(), b"first")
+        self.assertEqual(images[logs[2].id].mime_type, "image/png")
+
+    def test_bad_row_does_not_drop_batch(self):
+        """A row that cannot be inserted is skipped and the rest are retried one by one."""
+        writer = BufferedImageWriter()
+        canonical_log = RequestLog(
+            id=None,
+            user=self.user,
+            duration_ms=1,
+            request_bytes=1,
+            response_bytes=1,
+            status="success",
+            request_id=uuid.uuid4(),
+        )  # Never saved, so its image cannot be inserted
+        duplicate_log = create_request_log(self.user)
+        other_log = create_request_log(self.user)
+        writer.add(canonical_log, b"shared")
+        writer.add(duplicate_log, b"shared")
+        writer.add(other_log, b"other")
+
+        self.assertEqual(writer.flush(), 2)
+
+        duplicate = RequestImage.objects.get(request_log=duplicate_log)
+        self.assertIsNone(duplicate.canonical_image_id)
+        self.assertEqual(duplicate.get_image_bytes(), b"shared")
+        self.assertTrue(RequestImage.objects.filter(request_log=other_log).exists())
+
+    def test_byte_cap_flushes_inline(self):
+        """Reaching the buffered byte cap flushes without waiting for the thread."""
+        writer = BufferedImageWriter(max_buffered_bytes=10)
+        writer.add(create_request_log(self.user), b"small")
+        self.assertFalse(RequestImage.objects.exists())
+
+        writer.add(create_request_log(self.user), b"enough bytes")
+
+        self.assertEqual(RequestImage.objects.count(), 2)
+        self.assertEqual(writer.flush(), 0)
+
+
+class SolveViewImageSettingsTestCase(TestCase):
+    """Test which settings let /api/solve queue customer uploads for saving."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.user = User.objects.create(email="solver@example.com")
+
+    def setUp(self):
+        """Set up per-test state."""
+        patcher = patch.object(BufferedImageWriter, "_ensure_thread")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer = BufferedImageWriter()
+        patcher = patch("core.views.image_writer", self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def schedule_save(self):
+        request_log = create_request_log(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            SolveView()._schedule_image_save(request_log, b"upload")
+        return request_log
+
+    @override_settings(SAVE_REQUEST_IMAGES=True, SAVE_SOLVE_API_IMAGES=False)
+    def test_solve_api_images_are_off_by_default(self):
+        """SAVE_REQUEST_IMAGES alone does not store customer uploads from /api/solve."""
+        self.schedule_save()
+
+        self.assertEqual(self.writer.flush(), 0)
+        self.assertFalse(RequestImage.objects.exists())
+
+    @override_settings(SAVE_REQUEST_IMAGES=True, SAVE_SOLVE_API_IMAGES=True)
+    def test_enabled_queues_one_row(self):
+        """With SAVE_SOLVE_API_IMAGES set, each committed log queues exactly one image."""
+        request_log = self.schedule_save()
+
+        self.assertEqual(self.writer.flush(), 1)
+        image = RequestImage.objects.get()
+        self.assertEqual(image.request_log_id, request_log.id)
+        self.assertEqual(image.get_image_bytes(), b"upload")
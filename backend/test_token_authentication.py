@@ -8,106 +8,107 @@ This test suite verifies all security requirements for token authentication:
 4. Proper authentication flow
 """
 
-from datetime import UTC, datetime
 from unittest.mock import patch
 
+from argon2 import PasswordHasher
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core.authentication import BearerTokenAuthentication
 from customers.models import ApiToken
 
 User = get_user_model()
 
+# Fast (insecure) hasher for the test users; production settings keep Argon2
+FAST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 
-@override_settings(SAVE_REQUEST_IMAGES=False)
-class TokenAuthenticationTestCase(TestCase):
-    """Test API token authentication for the solver endpoint."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        self.client = APIClient()
-        self.solve_url = reverse("solve")
+# Hash the shared test password once instead of once per created user
+with override_settings(PASSWORD_HASHERS=FAST_PASSWORD_HASHERS):
+    HASHED_PASSWORD = make_password("testpass123")
 
-        # Create a verified user
-        self.verified_user = User.objects.create_user(
-            email="verified@example.com",
-            password="testpass123",
-        )
-        self.verified_user.email_verified_at = datetime.now(UTC)
-        self.verified_user.save()
 
-        # Create an unverified user
-        self.unverified_user = User.objects.create_user(
-            email="unverified@example.com",
-            password="testpass123",
-        )
+@override_settings(SAVE_REQUEST_IMAGES=False, PASSWORD_HASHERS=FAST_PASSWORD_HASHERS)
+class TokenAuthenticationTestCase(TestCase):
+    """Test API token authentication for the solver endpoint."""
 
-        # Create an inactive user
-        self.inactive_user = User.objects.create_user(
-            email="inactive@example.com",
-            password="testpass123",
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.solve_url = reverse("solve")
+
+        # Create verified, unverified and inactive users in a single query
+        now = timezone.now()
+        cls.verified_user, cls.unverified_user, cls.inactive_user = User.objects.bulk_create(
+            [
+                User(
+                    email="verified@example.com",
+                    password=HASHED_PASSWORD,
+                    email_verified_at=now,
+                ),
+                User(email="unverified@example.com", password=HASHED_PASSWORD),
+                User(
+                    email="inactive@example.com",
+                    password=HASHED_PASSWORD,
+                    email_verified_at=now,
+                    is_active=False,
+                ),
+            ]
         )
-        self.inactive_user.email_verified_at = datetime.now(UTC)
-        self.inactive_user.is_active = False
-        self.inactive_user.save()
 
-        # Generate tokens
-        self.verified_token, _, _ = ApiToken.generate_token()
-        self.verified_api_token = ApiToken.objects.create(
-            user=self.verified_user,
+        # Generate tokens (generate_token already returns the hash of the full token)
+        cls.verified_token, prefix, token_hash = ApiToken.generate_token()
+        cls.verified_api_token = ApiToken.objects.create(
+            user=cls.verified_user,
             name="Test Token",
-            token_prefix=self.verified_token[:12],
-            token_hash=ApiToken.generate_token()[2],  # Generate a new hash
+            token_prefix=prefix,
+            token_hash=token_hash,
         )
-        # Manually set the correct hash for our known token
-        from argon2 import PasswordHasher
-
-        ph = PasswordHasher()
-        self.verified_api_token.token_hash = ph.hash(self.verified_token)
-        self.verified_api_token.save()
 
         # Token for unverified user
-        self.unverified_token, _, _ = ApiToken.generate_token()
-        self.unverified_api_token = ApiToken.objects.create(
-            user=self.unverified_user,
+        cls.unverified_token, prefix, token_hash = ApiToken.generate_token()
+        cls.unverified_api_token = ApiToken.objects.create(
+            user=cls.unverified_user,
             name="Unverified Token",
-            token_prefix=self.unverified_token[:12],
-            token_hash=ApiToken.generate_token()[2],
+            token_prefix=prefix,
+            token_hash=token_hash,
         )
-        ph = PasswordHasher()
-        self.unverified_api_token.token_hash = ph.hash(self.unverified_token)
-        self.unverified_api_token.save()
 
         # Token for inactive user
-        self.inactive_token, _, _ = ApiToken.generate_token()
-        self.inactive_api_token = ApiToken.objects.create(
-            user=self.inactive_user,
+        cls.inactive_token, prefix, token_hash = ApiToken.generate_token()
+        cls.inactive_api_token = ApiToken.objects.create(
+            user=cls.inactive_user,
             name="Inactive Token",
-            token_prefix=self.inactive_token[:12],
-            token_hash=ApiToken.generate_token()[2],
+            token_prefix=prefix,
+            token_hash=token_hash,
         )
-        ph = PasswordHasher()
-        self.inactive_api_token.token_hash = ph.hash(self.inactive_token)
-        self.inactive_api_token.save()
 
         # Create a revoked token
-        self.revoked_token, _, _ = ApiToken.generate_token()
-        self.revoked_api_token = ApiToken.objects.create(
-            user=self.verified_user,
+        cls.revoked_token, prefix, token_hash = ApiToken.generate_token()
+        cls.revoked_api_token = ApiToken.objects.create(
+            user=cls.verified_user,
             name="Revoked Token",
-            token_prefix=self.revoked_token[:12],
-            token_hash=ApiToken.generate_token()[2],
+            token_prefix=prefix,
+            token_hash=token_hash,
+            revoked_at=now,
         )
-        ph = PasswordHasher()
-        self.revoked_api_token.token_hash = ph.hash(self.revoked_token)
-        self.revoked_api_token.revoked_at = datetime.now(UTC)
-        self.revoked_api_token.save()
 
-        # Create test image
+    def setUp(self):
+        """Set up per-test state."""
+        self.client = APIClient()
+
+        # Tokens are shared across tests, so start each test with cold caches
+        cache.clear()
+        BearerTokenAuthentication._token_cache.clear()
+
+        # Create test image (its stream is consumed by each upload)
         self.test_image = SimpleUploadedFile(
             name="test.jpg", content=b"fake_image_content", content_type="image/jpeg"
         )
@@ -155,6 +156,19 @@ class TokenAuthenticationTestCase(TestCase):
         # Returns 403 when permission check fails
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_prefix_miss_skips_hash_verification(self):
+        """Test that unknown or revoked prefixes are rejected without running Argon2."""
+        for token in ["tok_nonexistent123456", self.revoked_token]:
+            with self.subTest(token=token):
+                self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+                with patch.object(PasswordHasher, "verify") as mock_verify:
+                    response = self.client.post(
+                        self.solve_url, {"file": self.test_image}, format="multipart"
+                    )
+
+                mock_verify.assert_not_called()
+                self.assertNotEqual(response.status_code, status.HTTP_200_OK)
+
     def test_revoked_token(self):
         """Test request with revoked token is rejected."""
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.revoked_token}")
@@ -260,9 +274,10 @@ class TokenAuthenticationTestCase(TestCase):
     def test_token_prefix_uniqueness(self):
         """Test that token prefixes are unique."""
         # Generate many tokens and check prefix uniqueness
+        # Only the random part matters here, so skip the Argon2 hashing step
         prefixes = set()
         for _ in range(100):
-            token, prefix, _ = ApiToken.generate_token()
+            token, prefix = ApiToken.generate_token_value()
             self.assertEqual(len(prefix), 12)
             self.assertTrue(prefix.startswith("tok_"))
             prefixes.add(prefix)
@@ -271,60 +286,77 @@ class TokenAuthenticationTestCase(TestCase):
         self.assertEqual(len(prefixes), 100)
 
     def test_authorization_header_variations(self):
-        """Test various Authorization header formats."""
-        test_cases = [
-            ("bearer " + self.verified_token, False),  # lowercase bearer
-            ("BEARER " + self.verified_token, False),  # uppercase BEARER
-            ("Bearer  " + self.verified_token, False),  # extra space
-            (" Bearer " + self.verified_token, False),  # leading space
-            ("Basic " + self.verified_token, False),  # wrong auth type
-            (self.verified_token, False),  # no Bearer prefix
-            ("Bearer " + self.verified_token, True),  # correct format
+        """Test that malformed Authorization headers are rejected."""
+        # Encode the multipart payload once and reuse the same bytes for every case
+        body = encode_multipart(
+            BOUNDARY,
+            {
+                "file": SimpleUploadedFile(
+                    name="test.jpg", content=b"fake_image_content", content_type="image/jpeg"
+                )
+            },
+        )
+        rejected_headers = [
+            "bearer " + self.verified_token,  # lowercase bearer
+            "BEARER " + self.verified_token,  # uppercase BEARER
+            "Bearer  " + self.verified_token,  # extra space
+            " Bearer " + self.verified_token,  # leading space
+            "Basic " + self.verified_token,  # wrong auth type
+            self.verified_token,  # no Bearer prefix
         ]
 
-        for auth_header, should_succeed in test_cases:
+        for auth_header in rejected_headers:
             with self.subTest(auth_header=auth_header):
                 self.client.credentials(HTTP_AUTHORIZATION=auth_header)
                 response = self.client.post(
-                    self.solve_url, {"file": self.test_image}, format="multipart"
+                    self.solve_url, data=body, content_type=MULTIPART_CONTENT
                 )
 
-                if should_succeed:
-                    with patch("core.views.openai_client.solve_image") as mock_solve:
-                        mock_solve.return_value = {"result": "42", "model": "gpt-4"}
-                        self.client.credentials(HTTP_AUTHORIZATION=auth_header)
-                        response = self.client.post(
-                            self.solve_url, {"file": self.test_image}, format="multipart"
-                        )
-                        self.assertEqual(response.status_code, status.HTTP_200_OK)
-                else:
-                    # Returns 403 when permission check fails
-                    self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+                # Returns 403 when permission check fails
+                self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    @patch("core.views.openai_client.solve_image")
+    def test_authorization_header_correct_format(self, mock_solve):
+        """Test that a well-formed Bearer header is accepted."""
+        mock_solve.return_value = {"result": "42", "model": "gpt-4"}
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.verified_token)
+        response = self.client.post(self.solve_url, {"file": self.test_image}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+
+@override_settings(PASSWORD_HASHERS=FAST_PASSWORD_HASHERS)
 class TokenManagementTestCase(TestCase):
     """Test API token management endpoints."""
 
+    @classmethod
+    def setUpTestData(cls):
+        """Set up fixtures shared by every test in the class."""
+        cls.tokens_url = reverse("tokens")
+
+        # Create verified and unverified users in a single query
+        cls.user, cls.unverified_user = User.objects.bulk_create(
+            [
+                User(
+                    email="user@example.com",
+                    password=HASHED_PASSWORD,
+                    email_verified_at=timezone.now(),
+                ),
+                User(email="unverified@example.com", password=HASHED_PASSWORD),
+            ]
+        )
+
     def setUp(self):
-        """Set up test fixtures."""
+        """Set up per-test state."""
         self.client = APIClient()
 
-        # Create verified user
-        self.user = User.objects.create_user(email="user@example.com", password="testpass123")
-        self.user.email_verified_at = datetime.now(UTC)
-        self.user.save()
-
-        # Create unverified user
-        self.unverified_user = User.objects.create_user(
-            email="unverified@example.com", password="testpass123"
-        )
-
     def test_create_token_requires_verified_email(self):
         """Test that creating a token requires verified email."""
         # Login as unverified user
         self.client.force_authenticate(user=self.unverified_user)
 
-        response = self.client.post("/api/customers/tokens", {"name": "My Token"}, format="json")
+        response = self.client.post(self.tokens_url, {"name": "My Token"}, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
@@ -333,9 +365,7 @@ class TokenManagementTestCase(TestCase):
         # Login as verified user
         self.client.force_authenticate(user=self.user)
 
-        response = self.client.post(
-            "/api/customers/tokens", {"name": "My API Token"}, format="json"
-        )
+        response = self.client.post(self.tokens_url, {"name": "My API Token"}, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn("token_once", response.data)
@@ -358,7 +388,7 @@ class TokenManagementTestCase(TestCase):
         )
 
         self.client.force_authenticate(user=self.user)
-        response = self.client.get("/api/customers/tokens")
+        response = self.client.get(self.tokens_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
@@ -375,7 +405,7 @@ class TokenManagementTestCase(TestCase):
         )
 
         self.client.force_authenticate(user=self.user)
-        response = self.client.delete(f"/api/customers/tokens/{token.id}")
+        response = self.client.delete(reverse("token-revoke", args=[token.id]))
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
@@ -386,16 +416,18 @@ class TokenManagementTestCase(TestCase):
 
     def test_cannot_revoke_other_users_token(self):
         """Test that users cannot revoke other users' tokens."""
-        other_user = User.objects.create_user(email="other@example.com", password="pass123")
-        other_user.email_verified_at = datetime.now(UTC)
-        other_user.save()
+        other_user = User.objects.create(
+            email="other@example.com",
+            password=HASHED_PASSWORD,
+            email_verified_at=timezone.now(),
+        )
 
         other_token = ApiToken.objects.create(
             user=other_user, name="Other User Token", token_prefix="tok_other123", token_hash="hash"
         )
 
         self.client.force_authenticate(user=self.user)
-        response = self.client.delete(f"/api/customers/tokens/{other_token.id}")
+        response = self.client.delete(reverse("token-revoke", args=[other_token.id]))
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
@@ -1,12 +1,43 @@
-import base64
+import io
+from functools import partial
 from typing import Any
 
 from django.contrib import admin
-from django.http import HttpRequest
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, HttpResponse
+from django.urls import URLPattern, path, reverse
 from django.utils.html import format_html
 
 from .models import BillingPeriod, RequestImage, RequestLog
 
+FILE_SIZE_UNITS = ("B", "KB", "MB", "GB")
+PREVIEW_MAX_SIZE = (400, 400)
+# Uploaders choose the stored MIME type, so only raster formats are served inline
+INLINE_IMAGE_MIME_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp"})
+
+
+def _exceeds_preview_size(obj: RequestImage) -> bool:
+    """Whether the stored image is larger than the admin preview box (or unknown)."""
+    if obj.width is None or obj.height is None:
+        return True
+    return obj.width > PREVIEW_MAX_SIZE[0] or obj.height > PREVIEW_MAX_SIZE[1]
+
+
+def _render_thumbnail(image_bytes: bytes, mime_type: str) -> tuple[bytes, str]:
+    """Downscale an image to fit the preview box, falling back to the original bytes."""
+    try:
+        from PIL import Image
+
+        img = Image.open(io.BytesIO(image_bytes))
+        img.draft("RGB", PREVIEW_MAX_SIZE)  # Let JPEG decode at reduced scale
+        img.thumbnail(PREVIEW_MAX_SIZE)
+        output = io.BytesIO()
+        img.convert("RGB").save(output, format="JPEG", quality=80)
+        return output.getvalue(), "image/jpeg"
+    except Exception:
+        return image_bytes, mime_type
+
 
 @admin.register(RequestLog)
 class RequestLogAdmin(admin.ModelAdmin):
@@ -38,6 +69,10 @@ class RequestLogAdmin(admin.ModelAdmin):
     ]
     ordering = ["-request_ts"]
 
+    def get_queryset(self, request: HttpRequest) -> QuerySet[RequestLog]:
+        # Join the related rows rendered per row and on the detail page
+        return super().get_queryset(request).select_related("user", "token", "billing_period")
+
     def has_add_permission(self, request: HttpRequest) -> bool:
         # Make RequestLog read-only in admin
         return False
@@ -105,31 +140,19 @@ class BillingPeriodAdmin(admin.ModelAdmin):
     payment_status_badge.short_description = "Payment Status"  # type: ignore[attr-defined]
 
     def mark_as_paid(self, request: HttpRequest, queryset: Any) -> None:
-        count = 0
-        for period in queryset:
-            if period.can_be_marked_paid:
-                period.mark_as_paid()
-                count += 1
+        count = BillingPeriod.bulk_mark_as_paid(queryset)
         self.message_user(request, f"{count} billing periods marked as paid.")
 
     mark_as_paid.short_description = "Mark selected periods as paid"  # type: ignore[attr-defined]
 
     def mark_as_overdue(self, request: HttpRequest, queryset: Any) -> None:
-        count = 0
-        for period in queryset:
-            if not period.is_current and period.payment_status != "paid":
-                period.mark_as_overdue()
-                count += 1
+        count = BillingPeriod.bulk_mark_as_overdue(queryset)
         self.message_user(request, f"{count} billing periods marked as overdue.")
 
     mark_as_overdue.short_description = "Mark selected periods as overdue"  # type: ignore[attr-defined]
 
     def mark_as_waived(self, request: HttpRequest, queryset: Any) -> None:
-        count = 0
-        for period in queryset:
-            if not period.is_current and period.payment_status not in ["paid", "waived"]:
-                period.mark_as_waived()
-                count += 1
+        count = BillingPeriod.bulk_mark_as_waived(queryset)
         self.message_user(request, f"{count} billing periods marked as waived.")
 
     mark_as_waived.short_description = "Mark selected periods as waived"  # type: ignore[attr-defined]
@@ -164,19 +187,67 @@ class RequestImageAdmin(admin.ModelAdmin):
         # Make RequestImage read-only in admin
         return False
 
+    def get_queryset(self, request: HttpRequest) -> QuerySet[RequestImage]:
+        # Join the request log shown in list_display; the manager already skips the blob
+        return super().get_queryset(request).select_related("request_log")
+
+    def get_deleted_objects(self, objs: Any, request: HttpRequest) -> tuple[Any, ...]:
+        deleted_objects, model_count, perms_needed, _protected = super().get_deleted_objects(
+            objs, request
+        )
+        # Only duplicates reference an image, and they are promoted on delete
+        return deleted_objects, model_count, perms_needed, []
+
+    def delete_model(self, request: HttpRequest, obj: RequestImage) -> None:
+        self.delete_queryset(request, RequestImage.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[RequestImage]) -> None:
+        stored_names = set(queryset.exclude(image_file="").values_list("image_file", flat=True))
+        with transaction.atomic():
+            RequestImage.promote_duplicates(queryset)
+            super().delete_queryset(request, queryset)
+            transaction.on_commit(partial(RequestImage.delete_unused_files, stored_names))
+
+    def get_urls(self) -> list[URLPattern]:
+        urls = [
+            path(
+                "<uuid:object_id>/raw/",
+                self.admin_site.admin_view(self.image_raw_view, cacheable=True),
+                name="usage_requestimage_raw",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def image_raw_view(self, request: HttpRequest, object_id: str) -> HttpResponse:
+        # Serve the stored bytes so the detail page can reference them by URL
+        obj = self.get_object(request, object_id)
+        if obj is None or not self.has_view_permission(request, obj):
+            raise Http404("Image not found")
+
+        image_bytes, mime_type = obj.get_image_bytes(), obj.mime_type
+        if request.GET.get("thumbnail") and _exceeds_preview_size(obj):
+            image_bytes, mime_type = _render_thumbnail(image_bytes, mime_type)
+
+        if mime_type in INLINE_IMAGE_MIME_TYPES:
+            response = HttpResponse(image_bytes, content_type=mime_type)
+        else:
+            # Anything else (HTML, SVG, ...) could run script on the admin origin
+            response = HttpResponse(image_bytes, content_type="application/octet-stream")
+            response["Content-Disposition"] = f'attachment; filename="{obj.id}"'
+        response["Content-Security-Policy"] = "sandbox"
+        response["Cache-Control"] = "private, max-age=300"
+        return response
+
     def request_log_id(self, obj: RequestImage) -> str:
         return obj.request_log.request_id
 
     request_log_id.short_description = "Request ID"  # type: ignore[attr-defined]
 
     def file_size_display(self, obj: RequestImage) -> str:
-        # Convert bytes to human-readable format
+        # Convert bytes to human-readable format (each unit step is 2**10)
         size = obj.file_size
-        for unit in ["B", "KB", "MB"]:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} GB"
+        exponent = min((size.bit_length() - 1) // 10, 3) if size > 0 else 0
+        return f"{size / (1 << (exponent * 10)):.1f} {FILE_SIZE_UNITS[exponent]}"
 
     file_size_display.short_description = "Size"  # type: ignore[attr-defined]
 
@@ -188,13 +259,11 @@ class RequestImageAdmin(admin.ModelAdmin):
     dimensions.short_description = "Dimensions"  # type: ignore[attr-defined]
 
     def image_preview(self, obj: RequestImage) -> str:
-        # Show preview in admin
-        if obj.image_data:
-            b64_image = base64.b64encode(obj.image_data).decode("utf-8")
+        # Show preview in admin, loaded on demand from the raw image view
+        if obj.file_size:
             return format_html(
-                '<img src="data:{};base64,{}" style="max-width: 400px; max-height: 400px; border: 1px solid #ddd; padding: 5px;" />',
-                obj.mime_type,
-                b64_image,
+                '<img src="{}" style="max-width: 400px; max-height: 400px; border: 1px solid #ddd; padding: 5px;" />',
+                reverse("admin:usage_requestimage_raw", args=[obj.id]) + "?thumbnail=1",
             )
         return "No image"
 
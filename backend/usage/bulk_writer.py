@@ -0,0 +1,165 @@
+"""
+Buffered, batched writes for saved request images.
+
+Storing an image is the heaviest write on the request path (a multi-megabyte
+binary row). Instead of one INSERT per request, images are queued in process
+memory and a background thread flushes them with a single bulk INSERT once
+enough rows are pending or the flush interval elapses.
+
+Image rows are best effort: if the bulk INSERT fails, each row is retried on
+its own and only the rows that still fail are logged and dropped, matching
+how the views already treat image save errors. A failed bulk INSERT is still
+logged with its traceback since it usually means more than one bad row.
+
+The queue lives only in process memory. The atexit flush covers a clean
+shutdown, but rows still queued when a worker is killed (SIGKILL, OOM, a
+timed-out worker) are lost.
+"""
+
+import atexit
+import logging
+import threading
+import uuid
+from collections import deque
+
+from django.db import close_old_connections, transaction
+
+from .models import RequestImage, RequestLog
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedImageWriter:
+    """Queue RequestImage rows and insert them in batches from a background thread."""
+
+    def __init__(
+        self,
+        flush_size: int = 1000,
+        flush_interval_s: float = 0.5,
+        batch_size: int = 200,
+        max_buffered_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.flush_size = flush_size
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.max_buffered_bytes = max_buffered_bytes
+        self._buffer: deque[tuple[RequestLog, bytes, str]] = deque()
+        self._buffered_bytes = 0
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(
+        self, request_log: RequestLog, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> None:
+        """Queue an image for a committed request log."""
+        with self._buffer_lock:
+            self._buffer.append((request_log, image_bytes, mime_type))
+            self._buffered_bytes += len(image_bytes)
+            pending_rows, pending_bytes = len(self._buffer), self._buffered_bytes
+
+        if pending_bytes >= self.max_buffered_bytes:
+            # Bound memory: the caller flushes itself instead of waiting for the thread
+            self._flush_logged()
+            return
+
+        self._ensure_thread()
+        if pending_rows >= self.flush_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Insert everything queued so far; returns the number of rows written."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                pending = list(self._buffer)
+                self._buffer.clear()
+                self._buffered_bytes = 0
+            if not pending:
+                return 0
+
+            # Hashing and dimension probing happen here, off the request thread
+            images = [
+                RequestImage.build_from_bytes(request_log, image_bytes, mime_type)
+                for request_log, image_bytes, mime_type in pending
+            ]
+            # Repeats of an already stored image keep a reference instead of the bytes
+            RequestImage.link_duplicates(images)
+            try:
+                with transaction.atomic():
+                    RequestImage.objects.bulk_create(images, batch_size=self.batch_size)
+                    RequestImage.store_files_on_commit(images)
+            except Exception:
+                written = self._insert_one_by_one(
+                    images, [image_bytes for _, image_bytes, _ in pending]
+                )
+                logger.exception(
+                    f"Bulk insert of {len(images)} request images failed, "
+                    f"saved {written} row by row"
+                )
+                return written
+            return len(images)
+
+    def _insert_one_by_one(self, images: list[RequestImage], raw_bytes: list[bytes]) -> int:
+        """Insert rows individually so one bad row only loses itself."""
+        written = 0
+        # Failed canonical image id -> the row that stores its bytes instead (None until one does)
+        replacements: dict[uuid.UUID, uuid.UUID | None] = {}
+        for image, image_bytes in zip(images, raw_bytes, strict=True):
+            canonical_id = image.canonical_image_id
+            if canonical_id in replacements:
+                if replacements[canonical_id] is not None:
+                    image.canonical_image_id = replacements[canonical_id]
+                else:
+                    # Its canonical copy was not written, so this row keeps the bytes
+                    image.canonical_image_id = None
+                    if not image.image_file:
+                        image.image_data = image_bytes
+            try:
+                with transaction.atomic():
+                    image.save(force_insert=True)
+                    RequestImage.store_files_on_commit([image])
+            except Exception as e:
+                logger.error(f"Failed to save request image for log {image.request_log_id}: {e}")
+                if image.canonical_image_id is None:
+                    replacements.setdefault(image.id, None)
+                continue
+            written += 1
+            if canonical_id in replacements and replacements[canonical_id] is None:
+                replacements[canonical_id] = image.id
+        return written
+
+    def _ensure_thread(self) -> None:
+        # Started lazily so that pre-forking servers spawn it in each worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is None:
+                atexit.register(self._safe_flush)
+            self._thread = threading.Thread(
+                target=self._run, name="request-image-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            self._safe_flush()
+
+    def _safe_flush(self) -> None:
+        # Drop connections that went stale while the thread was idle
+        close_old_connections()
+        self._flush_logged()
+
+    def _flush_logged(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered request images: {e}")
+
+
+image_writer = BufferedImageWriter()
@@ -3,6 +3,8 @@ from typing import Any
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
 from django.utils import timezone
 
 from usage.models import RequestImage
@@ -29,8 +31,13 @@ class Command(BaseCommand):
         dry_run = options["dry_run"]
 
         cutoff_date = timezone.now() - timedelta(days=days)
-        old_images = RequestImage.objects.filter(created_at__lt=cutoff_date)
-        count = old_images.count()
+        # Keep canonical copies that newer, retained duplicates still point to
+        old_images = RequestImage.objects.filter(created_at__lt=cutoff_date).exclude(
+            duplicates__created_at__gte=cutoff_date
+        )
+        # Count and total size in a single query
+        stats = old_images.aggregate(count=Count("id"), total_size=Sum("file_size"))
+        count = stats["count"] or 0
 
         if count == 0:
             self.stdout.write(
@@ -38,9 +45,7 @@ class Command(BaseCommand):
             )
             return
 
-        # Calculate total size of images to be deleted
-        total_size = sum(img.file_size for img in old_images)
-        size_mb = total_size / (1024 * 1024)
+        size_mb = (stats["total_size"] or 0) / (1024 * 1024)
 
         if dry_run:
             self.stdout.write(
@@ -50,18 +55,27 @@ class Command(BaseCommand):
                 )
             )
             # Show sample of images that would be deleted
-            sample_images = old_images[:5]
-            if sample_images:
-                self.stdout.write("\nSample of images to be deleted:")
-                for img in sample_images:
-                    self.stdout.write(
-                        f"  - Request {img.request_log.request_id} "
-                        f"from {img.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
-                    )
-                if count > 5:
-                    self.stdout.write(f"  ... and {count - 5} more")
+            sample_images = old_images.select_related("request_log").only(
+                "created_at", "request_log__request_id"
+            )[:5]
+            self.stdout.write("\nSample of images to be deleted:")
+            for img in sample_images:
+                self.stdout.write(
+                    f"  - Request {img.request_log.request_id} "
+                    f"from {img.created_at:%Y-%m-%d %H:%M:%S}"
+                )
+            if count > 5:
+                self.stdout.write(f"  ... and {count - 5} more")
         else:
-            old_images.delete()
+            stored_names = set(
+                old_images.exclude(image_file="").values_list("image_file", flat=True)
+            )
+            with transaction.atomic():
+                # A no-op while the exclude above keeps referenced canonical images, but
+                # any duplicate outliving its canonical copy must take over the bytes
+                RequestImage.promote_duplicates(old_images)
+                old_images.delete()
+            RequestImage.delete_unused_files(stored_names)
             self.stdout.write(
                 self.style.SUCCESS(
                     f"Successfully deleted {count} old images "
@@ -7,8 +7,10 @@ from typing import Any
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from usage.utils import get_or_create_current_billing_period
+from usage.models import BillingPeriod
+from usage.utils import get_current_period_bounds
 
 User = get_user_model()
 
@@ -17,12 +19,44 @@ class Command(BaseCommand):
     help = "Create current billing periods for all active users"
 
     def handle(self, *args: Any, **options: Any) -> None:
-        users = User.objects.filter(is_active=True)
-        count = 0
-
-        for user in users:
-            get_or_create_current_billing_period(user)
-            count += 1
-            self.stdout.write(f"Created/updated billing period for {user.email}")
-
-        self.stdout.write(self.style.SUCCESS(f"Processed {count} users"))
+        period_start, period_end = get_current_period_bounds()
+        user_ids = set(User.objects.filter(is_active=True).values_list("id", flat=True))
+
+        with transaction.atomic():
+            # Retire stale current periods from previous months
+            BillingPeriod.objects.filter(user__is_active=True, is_current=True).exclude(
+                period_start=period_start
+            ).update(is_current=False)
+
+            # Re-flag existing rows for this month that lost their current flag
+            updated = BillingPeriod.objects.filter(
+                user__is_active=True, period_start=period_start, is_current=False
+            ).update(is_current=True)
+
+            existing = set(
+                BillingPeriod.objects.filter(
+                    user__is_active=True, period_start=period_start
+                ).values_list("user_id", flat=True)
+            )
+            missing = user_ids - existing
+            # Rows a concurrent run inserted first are dropped as conflicts, and
+            # bulk_create() still returns them, so the count is of attempted inserts
+            BillingPeriod.objects.bulk_create(
+                [
+                    BillingPeriod(
+                        user_id=user_id,
+                        period_start=period_start,
+                        period_end=period_end,
+                        is_current=True,
+                    )
+                    for user_id in missing
+                ],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {len(user_ids)} users ({len(missing)} attempted, {updated} updated)"
+            )
+        )
@@ -1,17 +1,91 @@
 import calendar
-import io
+import contextlib
+import functools
+import itertools
+import os
 import random
 import uuid
-from datetime import date, datetime, timedelta
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, NamedTuple
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils import timezone
-from PIL import Image, ImageDraw, ImageFont
 
 from customers.models import ApiToken, User
 from usage.models import BillingPeriod, RequestImage, RequestLog
+from usage.synthetic_images import render_image_bytes
+
+# Static lookup tables for the random result helpers
+_WORDS = (
+    "verified",
+    "authenticated",
+    "solved",
+    "completed",
+    "processed",
+    "alpha",
+    "beta",
+    "gamma",
+    "delta",
+    "epsilon",
+    "zeta",
+    "eta",
+    "theta",
+    "success",
+    "valid",
+    "accepted",
+    "confirmed",
+    "approved",
+    "passed",
+    "analyzed",
+    "detected",
+    "recognized",
+    "identified",
+    "matched",
+)
+_PATTERN_SHAPES = ("Triangle", "Square", "Circle", "Pentagon", "Hexagon")
+_REFERENCE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+_ERROR_CODES = (
+    "INVALID_IMAGE",
+    "TIMEOUT",
+    "RATE_LIMIT",
+    "SERVER_ERROR",
+    "BAD_REQUEST",
+    "UNSUPPORTED_FORMAT",
+    "AUTH_FAILED",
+    "QUOTA_EXCEEDED",
+)
+_PAID_NOTES = (
+    "Payment received via bank transfer",
+    "Payment received via credit card",
+    "Payment received via wire transfer",
+)
+_WAIVED_NOTES = (
+    "Promotional period - charges waived",
+    "Beta testing period - charges waived",
+    "Special credit applied - charges waived",
+)
+
+
+def _uuid4_batch(count: int) -> list[uuid.UUID]:
+    """Build `count` version-4 UUIDs from a single os.urandom() call."""
+    blob = os.urandom(16 * count)
+    return [uuid.UUID(bytes=blob[i : i + 16], version=4) for i in range(0, 16 * count, 16)]
+
+
+class RequestMetrics(NamedTuple):
+    """Pre-drawn random values for a single synthetic request."""
+
+    hour: int
+    minute: int
+    second: int
+    duration_ms: int
+    request_bytes: int
+    response_bytes: int
+    status: str
+    log_id: uuid.UUID
+    request_id: uuid.UUID
 
 
 class Command(BaseCommand):
@@ -55,6 +129,17 @@ class Command(BaseCommand):
             choices=["paid", "pending", "overdue", "waived"],
             help="Payment status for the period (auto-determined if not specified)",
         )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Seed for the random generator to make the output reproducible",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes used to render images (1 renders in-process)",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
         month = options["month"]
@@ -64,6 +149,9 @@ class Command(BaseCommand):
         max_requests = options["max_requests_per_day"]
         payment_status = options.get("payment_status")
 
+        # Single generator instance threaded through the helpers
+        rng = random.Random(options.get("seed"))
+
         # Validate that we're not generating future data
         current_date = timezone.now().date()
         period_start = date(year, month, 1)
@@ -104,6 +192,80 @@ class Command(BaseCommand):
         else:
             self.stdout.write(f"This is a CLOSED billing period (status: {payment_status})")
 
+        # Generate data for the entire month
+        last_day = calendar.monthrange(year, month)[1]
+        start_date = date(year, month, 1)
+
+        # For current month, only generate up to today
+        if is_current:
+            end_date = min(date(year, month, last_day), current_date)
+        else:
+            end_date = date(year, month, last_day)
+
+        # Generate RequestImage for successful requests
+        # Higher chance for current month, lower for older months
+        image_chance = 0.8 if is_current else max(0.6, 0.8 - (current_date.month - month) * 0.05)
+
+        # Lower JPEG quality for older data
+        image_quality = 85 if month_name in ["AUGUST", "JULY"] else 75
+
+        # Draw the per-day request counts and every row's metrics up front
+        num_days = (end_date - start_date).days + 1
+        per_day_counts = rng.choices(range(min_requests, max_requests + 1), k=num_days)
+        metrics = self._draw_request_metrics(rng, sum(per_day_counts), is_current)
+
+        # Resolved once rather than for every generated row
+        tz = timezone.get_current_timezone()
+
+        total_requests_generated = 0
+        current_gen_date = start_date
+        progress_lines = []
+        log_batch: list[RequestLog] = []
+        image_batch: list[RequestImage] = []
+
+        # Image rendering is CPU-bound, so fan it out over worker processes
+        workers = max(1, options["workers"])
+        executor_context = (
+            ProcessPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext()
+        )
+
+        # Build every log and image in memory first so the transaction below only
+        # covers the database writes
+        with executor_context as executor:
+            render = functools.partial(executor.map, chunksize=32) if executor else map
+
+            for num_requests in per_day_counts:
+                day_logs = [
+                    self._generate_request_log(current_gen_date, row_metrics, tz, rng)
+                    for row_metrics in metrics[
+                        total_requests_generated : total_requests_generated + num_requests
+                    ]
+                ]
+
+                image_logs = [
+                    request_log
+                    for request_log in day_logs
+                    if request_log.status == "success" and rng.random() < image_chance
+                ]
+                # Render in worker processes, seeding each task so output is reproducible
+                seeds = [rng.getrandbits(32) for _ in image_logs]
+                texts = [self._generate_image_text(log, month_name, rng) for log in image_logs]
+                rendered = render(render_image_bytes, seeds, texts, itertools.repeat(image_quality))
+                image_batch.extend(
+                    RequestImage.build_from_bytes(log, image_bytes, mime_type="image/jpeg")
+                    for log, image_bytes in zip(image_logs, rendered, strict=True)
+                )
+
+                log_batch.extend(day_logs)
+                total_requests_generated += num_requests
+
+                progress_lines.append(
+                    f"Generated {num_requests} requests for {current_gen_date.strftime('%Y-%m-%d')}"
+                )
+                current_gen_date += timedelta(days=1)
+
+        # Status messages from inside the transaction, written once it has committed
+        messages: list[str] = []
         with transaction.atomic():
             # Get or create user
             user, user_created = User.objects.get_or_create(
@@ -114,123 +276,113 @@ class Command(BaseCommand):
                 },
             )
             if user_created:
-                self.stdout.write(self.style.SUCCESS(f"Created new user: {user_email}"))
+                messages.append(self.style.SUCCESS(f"Created new user: {user_email}"))
             else:
-                self.stdout.write(f"Using existing user: {user_email}")
+                messages.append(f"Using existing user: {user_email}")
 
             # Create or get the API token for this month
-            api_token = self._create_or_get_api_token(user, month_name, year, month)
+            api_token = self._create_or_get_api_token(user, month_name, year, month, messages)
 
             # Create or get billing period
             billing_period = self._create_or_get_billing_period(
-                user, year, month, is_current, payment_status
+                user, year, month, is_current, payment_status, messages
             )
 
-            # Generate data for the entire month
-            last_day = calendar.monthrange(year, month)[1]
-            start_date = date(year, month, 1)
-
-            # For current month, only generate up to today
-            if is_current:
-                end_date = min(date(year, month, last_day), current_date)
-            else:
-                end_date = date(year, month, last_day)
-
-            total_requests_generated = 0
-            current_gen_date = start_date
-
-            while current_gen_date <= end_date:
-                # Generate random number of requests for this day
-                num_requests = random.randint(min_requests, max_requests)
-
-                for _ in range(num_requests):
-                    request_log = self._generate_request_log(
-                        user, api_token, billing_period, current_gen_date, is_current
-                    )
+            for request_log in log_batch:
+                request_log.user = user
+                request_log.token = api_token
+                request_log.billing_period = billing_period
 
-                    # Generate RequestImage for successful requests
-                    # Higher chance for current month, lower for older months
-                    image_chance = (
-                        0.8 if is_current else max(0.6, 0.8 - (current_date.month - month) * 0.05)
-                    )
-                    if request_log.status == "success" and random.random() < image_chance:
-                        self._generate_request_image(request_log, month_name)
-
-                    total_requests_generated += 1
-
-                self.stdout.write(
-                    f"Generated {num_requests} requests for {current_gen_date.strftime('%Y-%m-%d')}"
-                )
-                current_gen_date += timedelta(days=1)
+            RequestLog.objects.bulk_create(log_batch, batch_size=1000)
+            # Smaller batches since every row carries the image payload
+            RequestImage.objects.bulk_create(image_batch, batch_size=200)
+            # Storage objects are only written once the rows are committed
+            RequestImage.store_files_on_commit(image_batch)
 
             # Update billing period totals and close it if not current
-            self._update_billing_period(billing_period, is_current, payment_status, year, month)
+            self._update_billing_period(
+                billing_period,
+                is_current,
+                payment_status,
+                year,
+                month,
+                rng,
+            )
 
+        self.stdout.write("\n".join(messages + progress_lines))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nSuccessfully generated {total_requests_generated} requests for {period_label}!"
+            )
+        )
+        self.stdout.write(
+            f"Billing period total: {billing_period.total_requests} requests, "
+            f"${billing_period.total_cost_cents / 100:.2f}"
+        )
+
+        if is_current:
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"\nSuccessfully generated {total_requests_generated} requests for {period_label}!"
+                    f"Period status: CURRENT - Payment status: {billing_period.payment_status.upper()}"
                 )
             )
+        else:
             self.stdout.write(
-                f"Billing period total: {billing_period.total_requests} requests, "
-                f"${billing_period.total_cost_cents / 100:.2f}"
+                f"Period status: CLOSED - Payment status: {billing_period.payment_status.upper()}"
             )
-
-            if is_current:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Period status: CURRENT - Payment status: {billing_period.payment_status.upper()}"
-                    )
-                )
-            else:
+            if payment_status == "overdue":
                 self.stdout.write(
-                    f"Period status: CLOSED - Payment status: {billing_period.payment_status.upper()}"
+                    self.style.WARNING("This period is OVERDUE and requires payment!")
                 )
-                if payment_status == "overdue":
-                    self.stdout.write(
-                        self.style.WARNING("This period is OVERDUE and requires payment!")
-                    )
 
     def _create_or_get_api_token(
-        self, user: User, month_name: str, year: int, month: int
+        self, user: User, month_name: str, year: int, month: int, messages: list[str]
     ) -> ApiToken:
-        """Create or retrieve the API token for the specified month."""
-        # Check if token already exists
-        try:
-            token = ApiToken.objects.get(user=user, name=month_name, revoked_at__isnull=True)
-            self.stdout.write(f"Using existing API token: {month_name}")
+        """Create or retrieve the API token for the month; status lines go to messages."""
+        # Reuse the existing token, locking it for the rest of the transaction
+        token = (
+            ApiToken.objects.select_for_update()
+            .filter(user=user, name=month_name, revoked_at__isnull=True)
+            .first()
+        )
+        if token is not None:
+            messages.append(f"Using existing API token: {month_name}")
             return token
-        except ApiToken.DoesNotExist:
-            # Generate new token
-            full_token, token_prefix, token_hash = ApiToken.generate_token()
-            token = ApiToken.objects.create(
-                user=user,
-                name=month_name,
-                token_prefix=token_prefix,
-                token_hash=token_hash,
-            )
 
-            # Set last used date to end of the month for past months
-            current_date = timezone.now().date()
-            if date(year, month, 1) < date(current_date.year, current_date.month, 1):
-                last_day = calendar.monthrange(year, month)[1]
-                token.last_used_at = datetime(
-                    year, month, last_day, 23, 59, 59, tzinfo=timezone.get_current_timezone()
-                )
-                token.save(update_fields=["last_used_at"])
+        # Generate new token
+        full_token, token_prefix, token_hash = ApiToken.generate_token()
+        token = ApiToken.objects.create(
+            user=user,
+            name=month_name,
+            token_prefix=token_prefix,
+            token_hash=token_hash,
+        )
 
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Created new API token '{month_name}' with prefix: {token_prefix}"
-                )
+        # Set last used date to end of the month for past months
+        current_date = timezone.now().date()
+        if date(year, month, 1) < date(current_date.year, current_date.month, 1):
+            last_day = calendar.monthrange(year, month)[1]
+            token.last_used_at = datetime(
+                year, month, last_day, 23, 59, 59, tzinfo=timezone.get_current_timezone()
             )
-            self.stdout.write(self.style.WARNING(f"Full token (save this): {full_token}"))
-            return token
+            token.save(update_fields=["last_used_at"])
+
+        messages.append(
+            self.style.SUCCESS(f"Created new API token '{month_name}' with prefix: {token_prefix}")
+        )
+        messages.append(self.style.WARNING(f"Full token (save this): {full_token}"))
+        return token
 
     def _create_or_get_billing_period(
-        self, user: User, year: int, month: int, is_current: bool, payment_status: str
+        self,
+        user: User,
+        year: int,
+        month: int,
+        is_current: bool,
+        payment_status: str,
+        messages: list[str],
     ) -> BillingPeriod:
-        """Create or retrieve billing period for the specified month."""
+        """Create or retrieve billing period for the month; status lines go to messages."""
         period_start = date(year, month, 1)
         last_day = calendar.monthrange(year, month)[1]
         period_end = date(year, month, last_day)
@@ -246,13 +398,13 @@ class Command(BaseCommand):
         )
 
         if created:
-            self.stdout.write(
+            messages.append(
                 self.style.SUCCESS(
                     f"Created billing period for {calendar.month_name[month]} {year}"
                 )
             )
         else:
-            self.stdout.write(
+            messages.append(
                 f"Using existing billing period for {calendar.month_name[month]} {year}"
             )
             # Update is_current flag in case it changed
@@ -262,239 +414,161 @@ class Command(BaseCommand):
 
         return billing_period
 
+    def _draw_request_metrics(
+        self, rng: random.Random, count: int, is_current: bool
+    ) -> list[RequestMetrics]:
+        """Draw the random metrics for `count` requests, one batch call per field."""
+        choices = rng.choices
+        random_fn = rng.random
+        uniform = rng.uniform
+
+        hours = choices(range(24), k=count)
+        minutes = choices(range(60), k=count)
+        seconds = choices(range(60), k=count)
+        durations = choices(range(40, 2501), k=count)
+        request_sizes = choices(range(500, 60001), k=count)
+        success_sizes = choices(range(100, 15001), k=count)
+        error_sizes = choices(range(40, 801), k=count)
+
+        # Random (unseeded) UUIDs so reruns never collide; one urandom read for the whole batch
+        uuids = _uuid4_batch(2 * count)
+
+        # Success rate varies: 90% for current, 85-88% for past
+        if is_current:
+            statuses = ["success" if random_fn() < 0.9 else "error" for _ in range(count)]
+        else:
+            statuses = [
+                "success" if random_fn() < uniform(0.85, 0.88) else "error" for _ in range(count)
+            ]
+
+        return [
+            RequestMetrics(
+                hour=hours[i],
+                minute=minutes[i],
+                second=seconds[i],
+                duration_ms=durations[i],
+                request_bytes=request_sizes[i],
+                response_bytes=success_sizes[i] if statuses[i] == "success" else error_sizes[i],
+                status=statuses[i],
+                log_id=uuids[2 * i],
+                request_id=uuids[2 * i + 1],
+            )
+            for i in range(count)
+        ]
+
     def _generate_request_log(
         self,
-        user: User,
-        api_token: ApiToken,
-        billing_period: BillingPeriod,
         request_date: date,
-        is_current: bool,
+        metrics: RequestMetrics,
+        tz: tzinfo,
+        rng: random.Random,
     ) -> RequestLog:
-        """Generate a random RequestLog entry."""
-        # Random time within the day
-        hour = random.randint(0, 23)
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-
-        request_time = datetime.combine(
-            request_date,
-            datetime.min.time().replace(hour=hour, minute=minute, second=second),
-            tzinfo=timezone.get_current_timezone(),
-        )
-
-        # Success rate varies: 90% for current, 85-88% for past
-        success_rate = 0.9 if is_current else random.uniform(0.85, 0.88)
-        status = "success" if random.random() < success_rate else "error"
-
-        # Generate random metrics
-        duration_ms = random.randint(40, 2500)
-        request_bytes = random.randint(500, 60000)
-        response_bytes = (
-            random.randint(100, 15000) if status == "success" else random.randint(40, 800)
+        """Generate a random, unsaved RequestLog from pre-drawn metrics, without its relations."""
+        request_time = datetime(
+            request_date.year,
+            request_date.month,
+            request_date.day,
+            metrics.hour,
+            metrics.minute,
+            metrics.second,
+            tzinfo=tz,
         )
+        status = metrics.status
 
         # Random error codes for failed requests
-        error_codes = [
-            "INVALID_IMAGE",
-            "TIMEOUT",
-            "RATE_LIMIT",
-            "SERVER_ERROR",
-            "BAD_REQUEST",
-            "UNSUPPORTED_FORMAT",
-            "AUTH_FAILED",
-            "QUOTA_EXCEEDED",
-        ]
-        error_code = random.choice(error_codes) if status == "error" else None
+        error_code = rng.choice(_ERROR_CODES) if status == "error" else None
 
         # Generate random result for successful requests
-        result = None
-        if status == "success":
-            result_types = [
-                f"Solution: {random.randint(1, 100)}",
-                f"Text: {self._generate_random_text()}",
-                f"Captcha: {''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=6))}",
-                f"Math: {random.randint(1, 999)} + {random.randint(1, 999)} = {random.randint(2, 1998)}",
-                f"Verification: {'PASSED' if random.random() > 0.2 else 'FAILED'}",
-                f"OCR: {self._generate_random_ocr_text()}",
-                f"Pattern: {self._generate_pattern_result()}",
-            ]
-            result = random.choice(result_types)
+        result = self._generate_result(rng) if status == "success" else None
 
-        request_log = RequestLog(
-            user=user,
-            token=api_token,
+        return RequestLog(
+            id=metrics.log_id,
             service="core.image_solve",
-            duration_ms=duration_ms,
-            request_bytes=request_bytes,
-            response_bytes=response_bytes,
+            request_ts=request_time,
+            duration_ms=metrics.duration_ms,
+            request_bytes=metrics.request_bytes,
+            response_bytes=metrics.response_bytes,
             status=status,
             error_code=error_code,
-            request_id=uuid.uuid4(),
-            billing_period=billing_period,
+            request_id=metrics.request_id,
             result=result,
+            cost_cents=1,  # $0.01 per request
         )
-        request_log.save()
-        # Manually update the timestamp after creation
-        RequestLog.objects.filter(id=request_log.id).update(request_ts=request_time)
-
-        return request_log
-
-    def _generate_request_image(self, request_log: RequestLog, month_name: str) -> RequestImage:
-        """Generate a random image for the request."""
-        width = random.choice([180, 200, 250, 300, 350, 400, 450, 500])
-        height = random.choice([80, 100, 120, 150, 180, 200, 250, 300])
-
-        # Create image with random background color
-        bg_color = (
-            random.randint(180, 255),
-            random.randint(180, 255),
-            random.randint(180, 255),
-        )
-        image = Image.new("RGB", (width, height), bg_color)
-        draw = ImageDraw.Draw(image)
-
-        # Add random shapes
-        for _ in range(random.randint(2, 12)):
-            shape_type = random.choice(["rectangle", "ellipse", "line", "polygon", "arc"])
-            color = (
-                random.randint(0, 255),
-                random.randint(0, 255),
-                random.randint(0, 255),
-            )
 
-            if shape_type == "rectangle":
-                coords = [
-                    random.randint(0, width // 2),
-                    random.randint(0, height // 2),
-                    random.randint(width // 2, width),
-                    random.randint(height // 2, height),
-                ]
-                draw.rectangle(coords, outline=color, width=2)
-            elif shape_type == "ellipse":
-                coords = [
-                    random.randint(0, width // 2),
-                    random.randint(0, height // 2),
-                    random.randint(width // 2, width),
-                    random.randint(height // 2, height),
-                ]
-                draw.ellipse(coords, outline=color, width=2)
-            elif shape_type == "arc":
-                coords = [
-                    random.randint(0, width // 2),
-                    random.randint(0, height // 2),
-                    random.randint(width // 2, width),
-                    random.randint(height // 2, height),
-                ]
-                draw.arc(
-                    coords,
-                    start=random.randint(0, 180),
-                    end=random.randint(180, 360),
-                    fill=color,
-                    width=2,
-                )
-            elif shape_type == "polygon":
-                points = []
-                for _ in range(random.randint(3, 7)):
-                    points.append((random.randint(0, width), random.randint(0, height)))
-                if len(points) > 2:
-                    draw.polygon(points, outline=color, width=2)
-            else:  # line
-                coords = [
-                    random.randint(0, width),
-                    random.randint(0, height),
-                    random.randint(0, width),
-                    random.randint(0, height),
-                ]
-                draw.line(coords, fill=color, width=random.randint(1, 5))
-
-        # Add text with month reference
-        text_options = [
-            f"{month_name}-{random.randint(1, 31):02d}",
-            f"ID: {request_log.request_id.hex[:10]}",
-            f"Code: {month_name[:3]}{random.randint(10000, 99999)}",
-            f"Batch: {random.randint(100, 999)}",
-            f"{''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=8))}",
-            f"{random.randint(100, 999)} / {random.randint(10, 99)}",
-        ]
-        text = random.choice(text_options)
-
-        try:
-            font = ImageFont.load_default()
-        except:
-            font = None
-
-        text_color = (
-            random.randint(0, 120),
-            random.randint(0, 120),
-            random.randint(0, 120),
-        )
-        draw.text((10, 10), text, fill=text_color, font=font)
-
-        # Convert to bytes
-        img_byte_arr = io.BytesIO()
-        quality = 85 if month_name in ["AUGUST", "JULY"] else 75  # Lower quality for older data
-        image.save(img_byte_arr, format="JPEG", quality=quality)
-        image_bytes = img_byte_arr.getvalue()
-
-        return RequestImage.create_from_bytes(
-            request_log=request_log,
-            image_bytes=image_bytes,
-            mime_type="image/jpeg",
-        )
-
-    def _generate_random_text(self) -> str:
+    def _generate_image_text(
+        self, request_log: RequestLog, month_name: str, rng: random.Random
+    ) -> str:
+        """Pick the caption drawn onto a request's generated image."""
+        randint = rng.randint
+
+        # Only the chosen caption is formatted
+        kind = rng.randrange(6)
+        if kind == 0:
+            return f"{month_name}-{randint(1, 31):02d}"
+        if kind == 1:
+            return f"ID: {request_log.request_id.hex[:10]}"
+        if kind == 2:
+            return f"Code: {month_name[:3]}{randint(10000, 99999)}"
+        if kind == 3:
+            return f"Batch: {randint(100, 999)}"
+        if kind == 4:
+            return "".join(rng.choices(_REFERENCE_ALPHABET, k=8))
+        return f"{randint(100, 999)} / {randint(10, 99)}"
+
+    def _generate_result(self, rng: random.Random) -> str:
+        """Generate the result of a successful request, building only the chosen kind."""
+        randint = rng.randint
+        kind = rng.randrange(7)
+        if kind == 0:
+            return f"Solution: {randint(1, 100)}"
+        if kind == 1:
+            return f"Text: {self._generate_random_text(rng)}"
+        if kind == 2:
+            return f"Captcha: {''.join(rng.choices(_REFERENCE_ALPHABET, k=6))}"
+        if kind == 3:
+            return f"Math: {randint(1, 999)} + {randint(1, 999)} = {randint(2, 1998)}"
+        if kind == 4:
+            return f"Verification: {'PASSED' if rng.random() > 0.2 else 'FAILED'}"
+        if kind == 5:
+            return f"OCR: {self._generate_random_ocr_text(rng)}"
+        return f"Pattern: {self._generate_pattern_result(rng)}"
+
+    def _generate_random_text(self, rng: random.Random) -> str:
         """Generate random text for results."""
-        words = [
-            "verified",
-            "authenticated",
-            "solved",
-            "completed",
-            "processed",
-            "alpha",
-            "beta",
-            "gamma",
-            "delta",
-            "epsilon",
-            "zeta",
-            "eta",
-            "theta",
-            "success",
-            "valid",
-            "accepted",
-            "confirmed",
-            "approved",
-            "passed",
-            "analyzed",
-            "detected",
-            "recognized",
-            "identified",
-            "matched",
-        ]
-        return " ".join(random.sample(words, k=random.randint(2, 4)))
+        return " ".join(rng.sample(_WORDS, k=rng.randint(2, 4)))
 
-    def _generate_random_ocr_text(self) -> str:
+    def _generate_random_ocr_text(self, rng: random.Random) -> str:
         """Generate random OCR-like text."""
-        templates = [
-            f"Invoice #{random.randint(100000, 999999)}",
-            f"Order ID: {uuid.uuid4().hex[:12].upper()}",
-            f"Reference: {''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=10))}",
-            f"Account: {random.randint(1000000, 9999999)}",
-            f"Serial: {random.randint(1000, 9999)}-{random.randint(1000, 9999)}-{random.randint(1000, 9999)}",
-            f"Document: DOC-{random.randint(100000, 999999)}",
-            f"Receipt: RCP{random.randint(100000000, 999999999)}",
-        ]
-        return random.choice(templates)
-
-    def _generate_pattern_result(self) -> str:
+        # Only the chosen template's random parts are drawn
+        randint = rng.randint
+        kind = rng.randrange(7)
+        if kind == 0:
+            return f"Invoice #{randint(100000, 999999)}"
+        if kind == 1:
+            return f"Order ID: {rng.getrandbits(48):012X}"
+        if kind == 2:
+            return f"Reference: {''.join(rng.choices(_REFERENCE_ALPHABET, k=10))}"
+        if kind == 3:
+            return f"Account: {randint(1000000, 9999999)}"
+        if kind == 4:
+            return f"Serial: {randint(1000, 9999)}-{randint(1000, 9999)}-{randint(1000, 9999)}"
+        if kind == 5:
+            return f"Document: DOC-{randint(100000, 999999)}"
+        return f"Receipt: RCP{randint(100000000, 999999999)}"
+
+    def _generate_pattern_result(self, rng: random.Random) -> str:
         """Generate pattern-based results."""
-        patterns = [
-            f"Grid: {random.randint(3, 9)}x{random.randint(3, 9)}",
-            f"Sequence: {', '.join([str(random.randint(1, 99)) for _ in range(5)])}",
-            f"Pattern: {''.join(random.choices('ABXY', k=8))}",
-            f"Matrix: [{random.randint(0, 1)} {random.randint(0, 1)} {random.randint(0, 1)}]",
-            f"Shape: {random.choice(['Triangle', 'Square', 'Circle', 'Pentagon', 'Hexagon'])}",
-        ]
-        return random.choice(patterns)
+        randint = rng.randint
+        kind = rng.randrange(5)
+        if kind == 0:
+            return f"Grid: {randint(3, 9)}x{randint(3, 9)}"
+        if kind == 1:
+            return f"Sequence: {', '.join([str(randint(1, 99)) for _ in range(5)])}"
+        if kind == 2:
+            return f"Pattern: {''.join(rng.choices('ABXY', k=8))}"
+        if kind == 3:
+            return f"Matrix: [{randint(0, 1)} {randint(0, 1)} {randint(0, 1)}]"
+        return f"Shape: {rng.choice(_PATTERN_SHAPES)}"
 
     def _update_billing_period(
         self,
@@ -503,16 +577,12 @@ class Command(BaseCommand):
         payment_status: str,
         year: int,
         month: int,
+        rng: random.Random,
     ) -> None:
-        """Update billing period with calculated totals and status."""
-        # Count total requests
-        total_requests = RequestLog.objects.filter(billing_period=billing_period).count()
+        """Update billing period status; totals were accumulated by the request_logs trigger."""
+        billing_period.refresh_from_db(fields=["total_requests", "total_cost_cents"])
+        total_cost_cents = billing_period.total_cost_cents
 
-        # Calculate cost (assuming $0.01 per request)
-        total_cost_cents = total_requests * 1  # 1 cent per request
-
-        billing_period.total_requests = total_requests
-        billing_period.total_cost_cents = total_cost_cents
         billing_period.is_current = is_current
 
         # Set payment status
@@ -530,39 +600,27 @@ class Command(BaseCommand):
                     payment_month = month + 1
                     payment_year = year
 
-                payment_day = random.randint(1, 15)
+                payment_day = rng.randint(1, 15)
                 billing_period.paid_at = datetime(
                     payment_year,
                     payment_month,
                     payment_day,
-                    random.randint(9, 17),
-                    random.randint(0, 59),
+                    rng.randint(9, 17),
+                    rng.randint(0, 59),
                     0,
                     tzinfo=timezone.get_current_timezone(),
                 )
                 billing_period.paid_amount_cents = total_cost_cents
                 billing_period.payment_reference = (
-                    f"INV-{year}-{month:02d}-{random.randint(1000, 9999)}"
-                )
-                billing_period.payment_notes = random.choice(
-                    [
-                        "Payment received via bank transfer",
-                        "Payment received via credit card",
-                        "Payment received via wire transfer",
-                    ]
+                    f"INV-{year}-{month:02d}-{rng.randint(1000, 9999)}"
                 )
+                billing_period.payment_notes = rng.choice(_PAID_NOTES)
             elif payment_status == "overdue":
                 days_overdue = (
                     timezone.now().date() - date(year, month + 1 if month < 12 else 1, 1)
                 ).days
                 billing_period.payment_notes = f"Payment due since {calendar.month_name[month + 1 if month < 12 else 1]} 1, {year}. Overdue by {days_overdue} days"
             elif payment_status == "waived":
-                billing_period.payment_notes = random.choice(
-                    [
-                        "Promotional period - charges waived",
-                        "Beta testing period - charges waived",
-                        "Special credit applied - charges waived",
-                    ]
-                )
+                billing_period.payment_notes = rng.choice(_WAIVED_NOTES)
 
         billing_period.save()
@@ -29,14 +29,19 @@ class Command(BaseCommand):
         # Mark periods as overdue if they ended > X days ago and are still pending
         cutoff_date = timezone.now().date() - timedelta(days=days)
 
-        overdue_periods = BillingPeriod.objects.filter(
-            period_end__lt=cutoff_date, payment_status="pending", is_current=False
+        overdue_periods = list(
+            BillingPeriod.objects.select_related("user").filter(
+                period_end__lt=cutoff_date, payment_status="pending", is_current=False
+            )
+        )
+
+        # One UPDATE for all of them rather than mark_as_overdue() row by row
+        count = BillingPeriod.bulk_mark_as_overdue(
+            BillingPeriod.objects.filter(pk__in=[period.pk for period in overdue_periods])
         )
 
-        count = 0
         for period in overdue_periods:
-            period.mark_as_overdue()
-            count += 1
+            period.payment_status = "overdue"
             self.stdout.write(f"Marked {period} as overdue")
 
         self.stdout.write(self.style.SUCCESS(f"Marked {count} billing periods as overdue"))
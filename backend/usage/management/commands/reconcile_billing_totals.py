@@ -0,0 +1,80 @@
+"""
+Verify billing period totals against their request logs and heal any drift.
+Totals are maintained by the request_logs insert trigger; this catches rows
+written around it (manual SQL, restores, deleted logs).
+Example cron: 0 3 * * * python manage.py reconcile_billing_totals --fix
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from usage.models import BillingPeriod, RequestLog
+
+
+class Command(BaseCommand):
+    help = "Compare billing period totals with their request logs and optionally fix drift"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite drifted totals from the request logs",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        drifted = list(
+            BillingPeriod.objects.select_related("user")
+            .annotate(
+                logged_requests=Count("requests"),
+                logged_cost_cents=Coalesce(Sum("requests__cost_cents"), 0),
+            )
+            .filter(
+                ~Q(total_requests=F("logged_requests"))
+                | ~Q(total_cost_cents=F("logged_cost_cents"))
+            )
+        )
+
+        for period in drifted:
+            self.stdout.write(
+                f"{period}: recorded {period.total_requests} requests / "
+                f"{period.total_cost_cents} cents, logged {period.logged_requests} / "
+                f"{period.logged_cost_cents}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All billing period totals match"))
+            return
+
+        if not options["fix"]:
+            self.stdout.write(
+                self.style.WARNING(f"{len(drifted)} billing periods drifted; rerun with --fix")
+            )
+            return
+
+        # Recomputed inside the UPDATE so logs inserted since the check are counted
+        period_logs = RequestLog.objects.filter(billing_period=OuterRef("pk")).order_by()
+        count = BillingPeriod.objects.filter(pk__in=[period.pk for period in drifted]).update(
+            total_requests=Coalesce(
+                Subquery(
+                    period_logs.values("billing_period").annotate(n=Count("id")).values("n"),
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            ),
+            total_cost_cents=Coalesce(
+                Subquery(
+                    period_logs.values("billing_period")
+                    .annotate(cost=Sum("cost_cents"))
+                    .values("cost"),
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            ),
+            updated_at=timezone.now(),
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Fixed totals for {count} billing periods"))
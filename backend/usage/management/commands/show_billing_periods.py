@@ -6,7 +6,7 @@ from typing import Any
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Sum
+from django.db.models import Count, Q, Sum
 
 from usage.models import BillingPeriod
 
@@ -60,10 +60,26 @@ class Command(BaseCommand):
         if status_filter:
             queryset = queryset.filter(payment_status=status_filter)
 
-        # Get the billing periods
-        periods = queryset.order_by("-period_start")
+        # Fetch the billing periods once for display (totals and status counts come from
+        # the aggregate below); only load the columns _display_period() reads
+        columns = [
+            "period_start",
+            "period_end",
+            "period_label",
+            "is_current",
+            "total_requests",
+            "total_cost_cents",
+            "payment_status",
+        ]
+        if verbose:
+            columns += ["paid_at", "paid_amount_cents", "payment_reference", "payment_notes"]
+        periods_qs = queryset.only(*columns)
+        if verbose:
+            # Log counts for every period in the same query instead of one COUNT each
+            periods_qs = periods_qs.annotate(request_count=Count("requests"))
+        periods = list(periods_qs.order_by("-period_start"))
 
-        if not periods.exists():
+        if not periods:
             self.stdout.write(self.style.WARNING(f"No billing periods found for {email}"))
             return
 
@@ -72,11 +88,16 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f"Billing Periods for {email}"))
         self.stdout.write("=" * 80)
 
-        # Calculate totals
-        total_stats = periods.aggregate(
+        # Calculate totals and per-status counts in a single query
+        status_aggregates = {
+            f"count_{status}": Count("id", filter=Q(payment_status=status))
+            for status, _ in BillingPeriod.PAYMENT_STATUS_CHOICES
+        }
+        total_stats = queryset.aggregate(
             total_requests=Sum("total_requests"),
             total_cost=Sum("total_cost_cents"),
             total_paid=Sum("paid_amount_cents"),
+            **status_aggregates,
         )
 
         # Display each period
@@ -86,7 +107,7 @@ class Command(BaseCommand):
         # Display summary
         self.stdout.write("=" * 80)
         self.stdout.write(self.style.SUCCESS("Summary:"))
-        self.stdout.write(f"  Total periods: {periods.count()}")
+        self.stdout.write(f"  Total periods: {len(periods)}")
         self.stdout.write(f"  Total requests: {total_stats['total_requests'] or 0:,}")
         self.stdout.write(f"  Total cost: ${(total_stats['total_cost'] or 0) / 100:,.2f}")
         if total_stats["total_paid"]:
@@ -95,7 +116,7 @@ class Command(BaseCommand):
         # Payment status breakdown
         status_counts = {}
         for status, label in BillingPeriod.PAYMENT_STATUS_CHOICES:
-            count = periods.filter(payment_status=status).count()
+            count = total_stats[f"count_{status}"]
             if count > 0:
                 status_counts[label] = count
 
@@ -141,6 +162,6 @@ class Command(BaseCommand):
                 self.stdout.write(f"  Notes: {period.payment_notes}")
 
             # Show related request count
-            request_count = period.requests.count()
+            request_count = period.request_count
             if request_count > 0:
                 self.stdout.write(f"  Request log entries: {request_count}")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0004_add_result_field"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="requestlog",
+            name="request_ts",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:46
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("customers", "0002_update_token_prefix_length"),
+        ("usage", "0006_requestimage_canonical_image"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="requestlog",
+            index=models.Index(
+                django.db.models.functions.datetime.TruncDate("request_ts"),
+                name="request_logs_request_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0007_requestlog_request_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="requestimage",
+            name="image_file",
+            field=models.FileField(blank=True, max_length=255, upload_to=""),
+        ),
+    ]
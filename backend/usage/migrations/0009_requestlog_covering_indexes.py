@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Covering indexes so the stats and verification aggregates can use index-only scans.
+# INCLUDE and CONCURRENTLY are PostgreSQL features, so other backends skip them.
+COVERING_INDEXES = {
+    "request_logs_user_stats_idx": (
+        "ON request_logs (user_id, request_ts DESC) "
+        "INCLUDE (duration_ms, request_bytes, response_bytes, status, billing_period_id)"
+    ),
+    "request_logs_period_stats_idx": (
+        "ON request_logs (billing_period_id, status) INCLUDE (duration_ms)"
+    ),
+}
+
+
+def create_covering_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, definition in COVERING_INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def drop_covering_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in COVERING_INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("usage", "0008_requestimage_image_file"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_covering_indexes, drop_covering_indexes),
+    ]
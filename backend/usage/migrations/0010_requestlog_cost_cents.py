@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:50
+
+from django.db import migrations, models
+
+
+def backfill_cost_cents(apps, schema_editor):
+    """Spread each period's recorded cost over its logs so the totals stay reconcilable."""
+    BillingPeriod = apps.get_model("usage", "BillingPeriod")
+    RequestLog = apps.get_model("usage", "RequestLog")
+
+    for period in BillingPeriod.objects.filter(total_cost_cents__gt=0).iterator():
+        log_ids = list(
+            RequestLog.objects.filter(billing_period_id=period.pk)
+            .order_by("request_ts", "pk")
+            .values_list("pk", flat=True)
+        )
+        if not log_ids:
+            continue
+        base, remainder = divmod(period.total_cost_cents, len(log_ids))
+        RequestLog.objects.filter(billing_period_id=period.pk).update(cost_cents=base)
+        if remainder:
+            RequestLog.objects.filter(pk__in=log_ids[:remainder]).update(cost_cents=base + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0009_requestlog_covering_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="requestlog",
+            name="cost_cents",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_cost_cents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+import warnings
+
+from django.db import migrations
+
+# Billing period totals are maintained by the database: every inserted request log
+# adds one request and its cost_cents to its period, in the inserting transaction.
+#
+# SQLite rebuilds a table for most ALTERs, and the trigger blocks rebuilding
+# billing_periods (and is dropped along with a rebuilt request_logs). Any later
+# migration that makes SQLite rebuild either table must wrap those operations in
+# without_sqlite_trigger() from this module, or dev and test databases silently
+# lose their totals.
+POSTGRES_CREATE = """
+CREATE OR REPLACE FUNCTION request_logs_add_to_billing_totals() RETURNS trigger AS $$
+BEGIN
+    UPDATE billing_periods
+    SET total_requests = total_requests + 1,
+        total_cost_cents = total_cost_cents + NEW.cost_cents,
+        updated_at = now()
+    WHERE id = NEW.billing_period_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER request_logs_billing_totals
+AFTER INSERT ON request_logs
+FOR EACH ROW WHEN (NEW.billing_period_id IS NOT NULL)
+EXECUTE FUNCTION request_logs_add_to_billing_totals();
+"""
+
+POSTGRES_DROP = """
+DROP TRIGGER IF EXISTS request_logs_billing_totals ON request_logs;
+DROP FUNCTION IF EXISTS request_logs_add_to_billing_totals();
+"""
+
+# SQLite keeps development and test databases consistent with production
+SQLITE_CREATE = """
+CREATE TRIGGER request_logs_billing_totals
+AFTER INSERT ON request_logs
+FOR EACH ROW WHEN NEW.billing_period_id IS NOT NULL
+BEGIN
+    UPDATE billing_periods
+    SET total_requests = total_requests + 1,
+        total_cost_cents = total_cost_cents + NEW.cost_cents,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = NEW.billing_period_id;
+END;
+"""
+
+SQLITE_DROP = "DROP TRIGGER IF EXISTS request_logs_billing_totals;"
+
+TRIGGER_SQL = {
+    "postgresql": (POSTGRES_CREATE, POSTGRES_DROP),
+    "sqlite": (SQLITE_CREATE, SQLITE_DROP),
+}
+
+
+def _trigger_sql(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in TRIGGER_SQL:
+        warnings.warn(
+            f"No billing totals trigger for the {vendor} backend; billing period totals "
+            "will not be maintained, run reconcile_billing_totals --fix to heal them",
+            RuntimeWarning,
+        )
+    return TRIGGER_SQL.get(vendor)
+
+
+def create_billing_totals_trigger(apps, schema_editor):
+    sql = _trigger_sql(schema_editor)
+    if sql:
+        schema_editor.execute(sql[0])
+
+
+def drop_billing_totals_trigger(apps, schema_editor):
+    sql = _trigger_sql(schema_editor)
+    if sql:
+        schema_editor.execute(sql[1])
+
+
+def drop_sqlite_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(SQLITE_DROP)
+
+
+def create_sqlite_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(SQLITE_CREATE)
+
+
+def without_sqlite_trigger(*operations):
+    """Run operations with the SQLite trigger dropped, recreating it afterwards."""
+    return [
+        migrations.RunPython(drop_sqlite_trigger, create_sqlite_trigger),
+        *operations,
+        migrations.RunPython(create_sqlite_trigger, drop_sqlite_trigger),
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0010_requestlog_cost_cents"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_billing_totals_trigger, drop_billing_totals_trigger),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:52
+
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+# SQLite rebuilds billing_periods for this migration, see 0011
+billing_totals_trigger = import_module("usage.migrations.0011_requestlog_billing_totals_trigger")
+
+
+def backfill_paid_periods(apps, schema_editor):
+    """Fill in payment details on periods set to paid without going through mark_as_paid()."""
+    BillingPeriod = apps.get_model("usage", "BillingPeriod")
+    paid = BillingPeriod.objects.filter(payment_status="paid")
+    paid.filter(paid_at__isnull=True).update(paid_at=F("updated_at"))
+    paid.filter(paid_amount_cents__isnull=True).update(paid_amount_cents=F("total_cost_cents"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0011_requestlog_billing_totals_trigger"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_paid_periods, migrations.RunPython.noop),
+        *billing_totals_trigger.without_sqlite_trigger(
+            migrations.AddConstraint(
+                model_name="billingperiod",
+                constraint=models.CheckConstraint(
+                    condition=models.Q(
+                        models.Q(("payment_status", "paid"), _negated=True),
+                        models.Q(("paid_amount_cents__isnull", False), ("paid_at__isnull", False)),
+                        _connector="OR",
+                    ),
+                    name="billing_periods_paid_has_payment",
+                ),
+            ),
+        ),
+    ]
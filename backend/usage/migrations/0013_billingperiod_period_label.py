@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:54
+
+from importlib import import_module
+
+import django.db.models.functions.comparison
+import django.db.models.functions.datetime
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# SQLite rebuilds billing_periods for this migration, see 0011
+billing_totals_trigger = import_module("usage.migrations.0011_requestlog_billing_totals_trigger")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0012_billingperiod_paid_has_payment"),
+    ]
+
+    operations = [
+        *billing_totals_trigger.without_sqlite_trigger(
+            migrations.AddField(
+                model_name="billingperiod",
+                name="period_label",
+                field=models.GeneratedField(
+                    db_persist=True,
+                    expression=django.db.models.functions.text.Concat(
+                        models.Case(
+                            models.When(period_start__month=1, then=models.Value("January")),
+                            models.When(period_start__month=2, then=models.Value("February")),
+                            models.When(period_start__month=3, then=models.Value("March")),
+                            models.When(period_start__month=4, then=models.Value("April")),
+                            models.When(period_start__month=5, then=models.Value("May")),
+                            models.When(period_start__month=6, then=models.Value("June")),
+                            models.When(period_start__month=7, then=models.Value("July")),
+                            models.When(period_start__month=8, then=models.Value("August")),
+                            models.When(period_start__month=9, then=models.Value("September")),
+                            models.When(period_start__month=10, then=models.Value("October")),
+                            models.When(period_start__month=11, then=models.Value("November")),
+                            models.When(period_start__month=12, then=models.Value("December")),
+                            output_field=models.CharField(),
+                        ),
+                        models.Value(" "),
+                        django.db.models.functions.comparison.Cast(
+                            django.db.models.functions.datetime.ExtractYear("period_start"),
+                            models.CharField(),
+                        ),
+                        output_field=models.CharField(),
+                    ),
+                    output_field=models.CharField(max_length=20),
+                ),
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 03:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0013_billingperiod_period_label"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="requestimage",
+            options={"base_manager_name": "objects"},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usage", "0014_requestimage_manager"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="requestimage",
+            name="canonical_image",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="duplicates",
+                to="usage.requestimage",
+            ),
+        ),
+    ]
@@ -1,14 +1,87 @@
+import calendar
 import hashlib
 import io
 import uuid
+from collections.abc import Callable
+from functools import partial
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models.functions import Cast, Concat, ExtractYear, TruncDate
 from django.utils import timezone as django_timezone
 
 User = get_user_model()
 
 
+def _get_image_hasher() -> Callable[[bytes], str]:
+    """Return the hex digest function selected by settings.IMAGE_HASH_ALGO."""
+    algo = settings.IMAGE_HASH_ALGO
+    if algo == "sha256":
+        # Only used for deduplication, which also keeps it usable on FIPS-restricted builds
+        return lambda data: hashlib.sha256(data, usedforsecurity=False).hexdigest()
+    if algo == "xxh3_128":
+        try:
+            import xxhash
+        except ImportError as e:
+            raise ImproperlyConfigured(
+                "IMAGE_HASH_ALGO='xxh3_128' requires the xxhash package"
+            ) from e
+        return xxhash.xxh3_128_hexdigest
+    raise ImproperlyConfigured(f"Unsupported IMAGE_HASH_ALGO: {algo!r}")
+
+
+_image_hexdigest = _get_image_hasher()
+
+REQUEST_IMAGE_STORAGE_PREFIX = "request_images"
+
+# PIL reads dimensions from the header, which fits in this much of the file for
+# practically every upload
+IMAGE_HEADER_PROBE_BYTES = 64 * 1024
+
+
+def _probe_image_size(image_bytes: bytes) -> tuple[int | None, int | None]:
+    """Extract image dimensions if possible, reading only the header when it suffices."""
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:
+        return None, None
+
+    buffers = [image_bytes[:IMAGE_HEADER_PROBE_BYTES]]
+    if len(image_bytes) > IMAGE_HEADER_PROBE_BYTES:
+        # Headers pushed past the probe (e.g. large EXIF blocks) need the full buffer
+        buffers.append(image_bytes)
+
+    for buffer in buffers:
+        try:
+            with Image.open(io.BytesIO(buffer)) as img:
+                return img.size
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            continue
+        except Exception:
+            break  # If we can't read the image, just skip dimensions
+    return None, None
+
+
+# "January 2025" style label built from only immutable SQL, so PostgreSQL accepts
+# it as a generated column (to_char() depends on the session locale)
+PERIOD_LABEL_EXPRESSION = Concat(
+    models.Case(
+        *[
+            models.When(period_start__month=month, then=models.Value(calendar.month_name[month]))
+            for month in range(1, 13)
+        ],
+        output_field=models.CharField(),
+    ),
+    models.Value(" "),
+    Cast(ExtractYear("period_start"), models.CharField()),
+    output_field=models.CharField(),
+)
+
+
 class BillingPeriod(models.Model):
     """Represents a monthly billing period."""
 
@@ -23,6 +96,12 @@ class BillingPeriod(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="billing_periods")
     period_start = models.DateField(db_index=True)
     period_end = models.DateField(db_index=True)
+    # Human-readable period label like 'January 2025', computed by the database
+    period_label = models.GeneratedField(
+        expression=PERIOD_LABEL_EXPRESSION,
+        output_field=models.CharField(max_length=20),
+        db_persist=True,
+    )
     total_requests = models.IntegerField(default=0)
     total_cost_cents = models.IntegerField(default=0)
     is_current = models.BooleanField(default=False)
@@ -54,15 +133,18 @@ class BillingPeriod(models.Model):
             models.Index(fields=["payment_status"]),
             models.Index(fields=["user", "payment_status"]),
         ]
+        constraints = [
+            # mark_as_paid() always records when and how much was paid
+            models.CheckConstraint(
+                condition=~models.Q(payment_status="paid")
+                | models.Q(paid_at__isnull=False, paid_amount_cents__isnull=False),
+                name="billing_periods_paid_has_payment",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.email} - {self.period_start.strftime('%Y-%m')} - {self.payment_status}"
 
-    @property
-    def period_label(self) -> str:
-        """Returns a human-readable period label like 'January 2025'"""
-        return self.period_start.strftime("%B %Y")
-
     @property
     def can_be_marked_paid(self) -> bool:
         """Check if this period can be marked as paid."""
@@ -117,6 +199,44 @@ class BillingPeriod(models.Model):
         self.payment_notes = notes
         self.save(update_fields=["payment_status", "payment_notes", "updated_at"])
 
+    @classmethod
+    def bulk_mark_as_paid(
+        cls,
+        queryset: models.QuerySet["BillingPeriod"],
+        reference: str | None = None,
+        notes: str | None = None,
+    ) -> int:
+        """Mark every payable period in queryset as paid with one UPDATE; returns the count."""
+        now = django_timezone.now()
+        return queryset.filter(is_current=False, payment_status__in=["pending", "overdue"]).update(
+            payment_status="paid",
+            paid_at=now,
+            paid_amount_cents=models.F("total_cost_cents"),
+            payment_reference=reference,
+            payment_notes=notes,
+            updated_at=now,
+        )
+
+    @classmethod
+    def bulk_mark_as_overdue(cls, queryset: models.QuerySet["BillingPeriod"]) -> int:
+        """Mark every closed, unpaid period in queryset as overdue with one UPDATE."""
+        return (
+            queryset.filter(is_current=False)
+            .exclude(payment_status="paid")
+            .update(payment_status="overdue", updated_at=django_timezone.now())
+        )
+
+    @classmethod
+    def bulk_mark_as_waived(
+        cls, queryset: models.QuerySet["BillingPeriod"], notes: str | None = None
+    ) -> int:
+        """Mark every closed, unpaid period in queryset as waived with one UPDATE."""
+        return (
+            queryset.filter(is_current=False)
+            .exclude(payment_status__in=["paid", "waived"])
+            .update(payment_status="waived", payment_notes=notes, updated_at=django_timezone.now())
+        )
+
 
 class RequestLog(models.Model):
     """Log of API requests for usage tracking."""
@@ -136,7 +256,8 @@ class RequestLog(models.Model):
         related_name="request_logs",
     )
     service = models.CharField(max_length=100, default="core.image_solve")
-    request_ts = models.DateTimeField(auto_now_add=True, db_index=True)
+    # default instead of auto_now_add so backfills can set historical timestamps
+    request_ts = models.DateTimeField(default=django_timezone.now, db_index=True)
     duration_ms = models.IntegerField()
     request_bytes = models.IntegerField()
     response_bytes = models.IntegerField()
@@ -146,6 +267,8 @@ class RequestLog(models.Model):
     billing_period = models.ForeignKey(
         "BillingPeriod", null=True, blank=True, on_delete=models.SET_NULL, related_name="requests"
     )
+    # Amount billed for this request; a database trigger adds it to the billing period totals
+    cost_cents = models.IntegerField(default=0)
     # Store the actual result for successful requests (added for auditing/debugging)
     result = models.TextField(
         null=True,
@@ -160,12 +283,21 @@ class RequestLog(models.Model):
             models.Index(fields=["user", "-request_ts"]),
             models.Index(fields=["request_ts"]),
             models.Index(fields=["request_id"]),
+            # Matches the TruncDate("request_ts") grouping in the image stats trends
+            models.Index(TruncDate("request_ts"), name="request_logs_request_date_idx"),
         ]
 
     def __str__(self) -> str:
         return f"{self.user.email} - {self.service} - {self.request_ts}"
 
 
+class RequestImageManager(models.Manager["RequestImage"]):
+    def get_queryset(self) -> models.QuerySet["RequestImage"]:
+        # The blob is only read by get_image_bytes(), which loads it on access;
+        # use .defer(None) to fetch it up front
+        return super().get_queryset().defer("image_data")
+
+
 class RequestImage(models.Model):
     """Stores image data for requests when SAVE_REQUEST_IMAGES is enabled."""
 
@@ -173,16 +305,36 @@ class RequestImage(models.Model):
     request_log = models.OneToOneField(
         "RequestLog", on_delete=models.CASCADE, related_name="saved_image"
     )
-    image_data = models.BinaryField()  # Raw image bytes
+    # Raw image bytes; empty when canonical_image or image_file holds them
+    image_data = models.BinaryField()
+    # Content-addressed object in the default storage (STORE_REQUEST_IMAGES_IN_STORAGE)
+    image_file = models.FileField(max_length=255, blank=True)
     mime_type = models.CharField(max_length=50, default="image/jpeg")
     file_size = models.IntegerField()  # Size in bytes
-    image_hash = models.CharField(max_length=64, db_index=True)  # SHA256 for deduplication
+    image_hash = models.CharField(max_length=64, db_index=True)  # IMAGE_HASH_ALGO digest for dedup
     width = models.IntegerField(null=True, blank=True)
     height = models.IntegerField(null=True, blank=True)
+    # Earlier image of the same user with identical bytes; duplicates don't store their own.
+    # RESTRICT still lets a user's images cascade together, but a canonical image with
+    # surviving duplicates must go through promote_duplicates() before it is deleted
+    canonical_image = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.RESTRICT,
+        related_name="duplicates",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = RequestImageManager()
+
+    # Bytes still to be written to image_file once the row is committed
+    _pending_file_bytes: bytes | None = None
+
     class Meta:
         db_table = "request_images"
+        # Related lookups (request_log.saved_image, canonical_image) skip the blob too
+        base_manager_name = "objects"
         indexes = [
             models.Index(fields=["image_hash"]),
             models.Index(fields=["created_at"]),
@@ -196,25 +348,145 @@ class RequestImage(models.Model):
         cls, request_log: "RequestLog", image_bytes: bytes, mime_type: str = "image/jpeg"
     ) -> "RequestImage":
         """Create RequestImage from raw bytes with metadata extraction."""
+        image = cls.build_from_bytes(request_log, image_bytes, mime_type)
+        cls.link_duplicates([image])
+        image.save(force_insert=True)
+        cls.store_files_on_commit([image])
+        return image
+
+    @classmethod
+    def link_duplicates(cls, images: list["RequestImage"]) -> None:
+        """
+        Point unsaved images at an existing identical image of the same user.
+
+        Matches are resolved with one indexed query for the whole batch; within the
+        batch, the first occurrence of a hash becomes the canonical copy.
+        """
+        if not images:
+            return
+
+        # Oldest canonical row per (hash, user)
+        canonical_ids: dict[tuple[str, int], uuid.UUID] = {}
+        existing = (
+            cls.objects.filter(
+                image_hash__in={image.image_hash for image in images},
+                canonical_image__isnull=True,
+            )
+            .order_by("created_at")
+            .values_list("image_hash", "request_log__user_id", "id")
+        )
+        for image_hash, user_id, image_id in existing:
+            canonical_ids.setdefault((image_hash, user_id), image_id)
+
+        for image in images:
+            key = (image.image_hash, image.request_log.user_id)
+            canonical_id = canonical_ids.setdefault(key, image.id)
+            if canonical_id != image.id:
+                image.canonical_image_id = canonical_id
+                image.image_data = b""
+
+    @classmethod
+    def promote_duplicates(cls, doomed: models.QuerySet["RequestImage"]) -> int:
+        """
+        Hand the bytes of canonical images about to be deleted to their duplicates.
+
+        For every canonical image in doomed with duplicates outside it, the oldest
+        surviving duplicate takes over the bytes (or storage object) and the other
+        duplicates are repointed at it. Returns the number of promoted images.
+        """
+        doomed_ids = doomed.values("pk")
+        survivors = (
+            cls.objects.filter(canonical_image__in=doomed_ids)
+            .exclude(pk__in=doomed_ids)
+            .order_by("created_at")
+            .values_list("pk", "canonical_image_id")
+        )
+        heirs: dict[uuid.UUID, uuid.UUID] = {}
+        for image_id, canonical_id in survivors:
+            heirs.setdefault(canonical_id, image_id)
+        if not heirs:
+            return 0
+
+        sources = cls.objects.defer(None).only("image_data", "image_file").in_bulk(heirs)
+        for canonical_id, heir_id in heirs.items():
+            source = sources[canonical_id]
+            cls.objects.filter(pk=heir_id).update(
+                image_data=source.image_data,
+                image_file=source.image_file.name,
+                canonical_image=None,
+            )
+            cls.objects.filter(canonical_image_id=canonical_id).exclude(pk=heir_id).update(
+                canonical_image_id=heir_id
+            )
+        return len(heirs)
+
+    def get_image_bytes(self) -> bytes:
+        """Return the stored bytes, following the canonical copy for duplicates."""
+        source = self.canonical_image if self.canonical_image_id is not None else self
+        if source.image_file:
+            with source.image_file.open("rb") as f:
+                return f.read()
+        return bytes(source.image_data)
+
+    @classmethod
+    def build_from_bytes(
+        cls, request_log: "RequestLog", image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> "RequestImage":
+        """Build an unsaved RequestImage from raw bytes (e.g. for bulk_create)."""
         # Calculate hash for deduplication
-        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        image_hash = _image_hexdigest(image_bytes)
 
-        # Extract image dimensions if possible
-        width, height = None, None
-        try:
-            from PIL import Image
+        width, height = _probe_image_size(image_bytes)
 
-            img = Image.open(io.BytesIO(image_bytes))
-            width, height = img.size
-        except Exception:
-            pass  # If we can't read the image, just skip dimensions
+        image_file, image_data = "", image_bytes
+        if settings.STORE_REQUEST_IMAGES_IN_STORAGE:
+            # Identical bytes map to the same object; it is written by store_files()
+            image_file = f"{REQUEST_IMAGE_STORAGE_PREFIX}/{image_hash[:2]}/{image_hash}"
+            image_data = b""
 
-        return cls.objects.create(
+        image = cls(
             request_log=request_log,
-            image_data=image_bytes,
+            image_data=image_data,
+            image_file=image_file,
             mime_type=mime_type,
             file_size=len(image_bytes),
             image_hash=image_hash,
             width=width,
             height=height,
         )
+        image._pending_file_bytes = image_bytes if image_file else None
+        return image
+
+    @classmethod
+    def store_files_on_commit(cls, images: list["RequestImage"]) -> None:
+        """Upload the storage objects of saved images once the current transaction commits."""
+        if any(image._pending_file_bytes for image in images):
+            transaction.on_commit(partial(cls.store_files, images))
+
+    @staticmethod
+    def store_files(images: list["RequestImage"]) -> None:
+        """Write the storage objects of canonical images built by build_from_bytes()."""
+        written: set[str] = set()
+        for image in images:
+            image_bytes = image._pending_file_bytes
+            if image_bytes is None or image.canonical_image_id is not None:
+                continue
+            name = image.image_file.name
+            if name not in written and not default_storage.exists(name):
+                stored = default_storage.save(name, ContentFile(image_bytes))
+                if stored != name:
+                    # Another writer stored the same bytes under this name first;
+                    # drop the suffixed copy so rows keep the content-addressed name
+                    default_storage.delete(stored)
+            written.add(name)
+            image._pending_file_bytes = None
+
+    @classmethod
+    def delete_unused_files(cls, names: set[str]) -> None:
+        """Delete storage objects that no remaining row references."""
+        # Storage objects are content-addressed, so only remove those no row still uses
+        still_used = set(
+            cls.objects.filter(image_file__in=names).values_list("image_file", flat=True)
+        )
+        for name in names - still_used:
+            default_storage.delete(name)
@@ -1,3 +1,4 @@
+from django.db.models import Max
 from rest_framework import serializers
 
 from .models import BillingPeriod, RequestImage, RequestLog
@@ -6,7 +7,6 @@ from .models import BillingPeriod, RequestImage, RequestLog
 class BillingPeriodSerializer(serializers.ModelSerializer):
     """Serializer for BillingPeriod model with automatic camelCase conversion."""
 
-    period_label = serializers.ReadOnlyField()
     can_be_marked_paid = serializers.ReadOnlyField()
 
     class Meta:
@@ -42,7 +42,6 @@ class BillingPeriodSerializer(serializers.ModelSerializer):
 class CurrentBillingPeriodSerializer(serializers.ModelSerializer):
     """Simplified serializer for current billing period display."""
 
-    period_label = serializers.ReadOnlyField()
     last_request_at = serializers.SerializerMethodField()
 
     class Meta:
@@ -61,8 +60,9 @@ class CurrentBillingPeriodSerializer(serializers.ModelSerializer):
 
     def get_last_request_at(self, obj: BillingPeriod) -> str | None:
         """Get the timestamp of the last request in this period."""
-        last_request = obj.requests.order_by("-request_ts").first()
-        return last_request.request_ts.isoformat() if last_request else None
+        # MAX() over the period's logs instead of sorting them and loading a whole row
+        last_request_ts = obj.requests.aggregate(latest=Max("request_ts"))["latest"]
+        return last_request_ts.isoformat() if last_request_ts else None
 
 
 class RequestLogSerializer(serializers.ModelSerializer):
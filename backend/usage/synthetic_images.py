@@ -0,0 +1,107 @@
+"""
+Rendering of synthetic request images for generated billing data.
+
+This module deliberately has no Django imports so that it can be used from
+worker processes regardless of the multiprocessing start method.
+"""
+
+import io
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Loaded once per process rather than for every rendered image
+try:
+    _DEFAULT_FONT = ImageFont.load_default()
+except Exception:
+    _DEFAULT_FONT = None
+
+_SHAPE_TYPES = ("rectangle", "ellipse", "line", "polygon", "arc")
+_CHANNEL_VALUES = range(256)
+
+# One reusable canvas per image size; each worker process keeps its own pool
+_CANVAS_POOL: dict[tuple[int, int], Image.Image] = {}
+
+
+def _get_canvas(width: int, height: int) -> Image.Image:
+    """Return the pooled RGB canvas for the given size, creating it on first use."""
+    canvas = _CANVAS_POOL.get((width, height))
+    if canvas is None:
+        canvas = _CANVAS_POOL[(width, height)] = Image.new("RGB", (width, height))
+    return canvas
+
+
+def render_image_bytes(seed: int, text: str, quality: int) -> bytes:
+    """Render a random JPEG with the given caption, deterministically from `seed`."""
+    rng = random.Random(seed)
+    randint = rng.randint
+    choice = rng.choice
+
+    width = choice([180, 200, 250, 300, 350, 400, 450, 500])
+    height = choice([80, 100, 120, 150, 180, 200, 250, 300])
+
+    # Reset a pooled canvas with a random background color
+    bg_color = (
+        randint(180, 255),
+        randint(180, 255),
+        randint(180, 255),
+    )
+    image = _get_canvas(width, height)
+    image.paste(bg_color, (0, 0, width, height))
+    draw = ImageDraw.Draw(image)
+
+    # Pre-draw every shape's type and color in bulk
+    num_shapes = randint(2, 12)
+    shape_types = rng.choices(_SHAPE_TYPES, k=num_shapes)
+    channels = rng.choices(_CHANNEL_VALUES, k=3 * num_shapes)
+    colors = zip(channels[0::3], channels[1::3], channels[2::3], strict=True)
+
+    # Add random shapes
+    half_width, half_height = width // 2, height // 2
+    for shape_type, color in zip(shape_types, colors, strict=True):
+        if shape_type == "line":
+            coords = (randint(0, width), randint(0, height), randint(0, width), randint(0, height))
+            draw.line(coords, fill=color, width=randint(1, 5))
+        elif shape_type == "polygon":
+            points = [(randint(0, width), randint(0, height)) for _ in range(randint(3, 7))]
+            draw.polygon(points, outline=color, width=2)
+        else:
+            # Rectangles, ellipses and arcs share a bounding box spanning the centre
+            coords = (
+                randint(0, half_width),
+                randint(0, half_height),
+                randint(half_width, width),
+                randint(half_height, height),
+            )
+            if shape_type == "rectangle":
+                draw.rectangle(coords, outline=color, width=2)
+            elif shape_type == "ellipse":
+                draw.ellipse(coords, outline=color, width=2)
+            else:  # arc
+                draw.arc(coords, start=randint(0, 180), end=randint(180, 360), fill=color, width=2)
+
+    # Add text
+    font = _DEFAULT_FONT
+
+    text_color = (
+        randint(0, 120),
+        randint(0, 120),
+        randint(0, 120),
+    )
+    draw.text((10, 10), text, fill=text_color, font=font)
+
+    # Convert to bytes
+    img_byte_arr = io.BytesIO()
+    # Single-pass baseline encode with 4:2:0 chroma subsampling; fixtures don't need
+    # optimized Huffman tables
+    image.save(
+        img_byte_arr,
+        format="JPEG",
+        quality=quality,
+        optimize=False,
+        progressive=False,
+        subsampling=2,
+    )
+    image_bytes = img_byte_arr.getvalue()
+
+    return image_bytes
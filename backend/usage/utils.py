@@ -1,5 +1,6 @@
-from datetime import timedelta
+from datetime import date, timedelta
 
+from django.core.cache import cache
 from django.utils import timezone
 
 from customers.models import User
@@ -7,10 +8,8 @@ from customers.models import User
 from .models import BillingPeriod
 
 
-def get_or_create_current_billing_period(user: User) -> BillingPeriod:
-    """Get or create billing period for current month."""
-    from .models import BillingPeriod
-
+def get_current_period_bounds() -> tuple[date, date]:
+    """Return (period_start, period_end) for the current month."""
     today = timezone.now().date()
     period_start = today.replace(day=1)
 
@@ -22,6 +21,31 @@ def get_or_create_current_billing_period(user: User) -> BillingPeriod:
     else:
         period_end = period_start.replace(month=period_start.month + 1, day=1) - timedelta(days=1)
 
+    return period_start, period_end
+
+
+CURRENT_PERIOD_CACHE_TIMEOUT = 3600
+
+
+def get_or_create_current_billing_period(user: User) -> BillingPeriod:
+    """Get or create billing period for current month."""
+    from .models import BillingPeriod
+
+    period_start, period_end = get_current_period_bounds()
+
+    # Once this month's period is flagged current, later calls only need to load it;
+    # the month in the key makes the first call of a new month take the full path
+    cache_key = f"bp:cur:{user.pk}:{period_start:%Y-%m}"
+    period_id = cache.get(cache_key)
+    if period_id is not None:
+        # A deleted or retired period falls through to the full path below
+        billing_period = BillingPeriod.objects.filter(
+            pk=period_id, user=user, is_current=True
+        ).first()
+        if billing_period is not None:
+            return billing_period
+        cache.delete(cache_key)
+
     # Mark any previous periods as not current
     BillingPeriod.objects.filter(user=user, is_current=True).update(is_current=False)
 
@@ -36,4 +60,5 @@ def get_or_create_current_billing_period(user: User) -> BillingPeriod:
         billing_period.is_current = True
         billing_period.save(update_fields=["is_current"])
 
+    cache.set(cache_key, billing_period.pk, CURRENT_PERIOD_CACHE_TIMEOUT)
     return billing_period
@@ -1,41 +1,49 @@
 from datetime import timedelta
 
+from django.core.cache import cache
 from django.db import models
 from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncDate
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
 from .models import RequestImage, RequestLog
 
+IMAGE_STATS_CACHE_KEY = "usage:perf_stats:v1"
+IMAGE_STATS_CACHE_TIMEOUT = 60
 
+
+@cache_control(private=True, max_age=30)
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def image_performance_stats(request):
     """Get performance statistics for saved images."""
+    # The stats cover days of data, so recomputing them at most once a minute is enough
+    stats = cache.get_or_set(
+        IMAGE_STATS_CACHE_KEY, _compute_image_performance_stats, IMAGE_STATS_CACHE_TIMEOUT
+    )
+    return Response(stats)
+
 
+def _compute_image_performance_stats() -> dict:
+    """Run the image performance aggregates and build the response payload."""
     # Get requests with saved images
-    requests_with_images = RequestLog.objects.filter(saved_image__isnull=False).select_related(
-        "saved_image"
-    )
+    requests_with_images = RequestLog.objects.filter(saved_image__isnull=False)
 
-    # Overall statistics
+    # Overall statistics and success/error counts in a single query
     stats = requests_with_images.aggregate(
         total_requests=Count("id"),
+        success_count=Count("id", filter=models.Q(status="success")),
+        error_count=Count("id", filter=models.Q(status="error")),
         avg_duration_ms=Avg("duration_ms"),
         avg_image_size=Avg("saved_image__file_size"),
         total_storage_bytes=Sum("saved_image__file_size"),
-        success_rate=(
-            Avg(Count("id", filter=models.Q(status="success")) * 100.0 / Count("id"))
-            if requests_with_images.exists()
-            else 0
-        ),
     )
-
-    # Calculate success/error counts
-    success_count = requests_with_images.filter(status="success").count()
-    error_count = requests_with_images.filter(status="error").count()
+    success_count = stats["success_count"]
+    error_count = stats["error_count"]
 
     # Group by image dimensions (top 10 most common)
     dimension_stats = (
@@ -75,7 +83,7 @@ def image_performance_stats(request):
     seven_days_ago = timezone.now() - timedelta(days=7)
     recent_stats = (
         requests_with_images.filter(request_ts__gte=seven_days_ago)
-        .extra(select={"day": "date(request_ts)"})
+        .annotate(day=TruncDate("request_ts"))
         .values("day")
         .annotate(
             count=Count("id"),
@@ -85,38 +93,36 @@ def image_performance_stats(request):
         .order_by("day")
     )
 
-    return Response(
-        {
-            "overall_stats": {
-                "total_requests": stats["total_requests"] or 0,
-                "success_count": success_count,
-                "error_count": error_count,
-                "avg_duration_ms": (
-                    round(stats["avg_duration_ms"], 2) if stats["avg_duration_ms"] else 0
+    return {
+        "overall_stats": {
+            "total_requests": stats["total_requests"] or 0,
+            "success_count": success_count,
+            "error_count": error_count,
+            "avg_duration_ms": (
+                round(stats["avg_duration_ms"], 2) if stats["avg_duration_ms"] else 0
+            ),
+            "avg_image_size_kb": (
+                round(stats["avg_image_size"] / 1024, 2) if stats["avg_image_size"] else 0
+            ),
+            "total_storage_mb": round((stats["total_storage_bytes"] or 0) / (1024 * 1024), 2),
+            "success_rate": round(
+                (
+                    (success_count / (success_count + error_count) * 100)
+                    if (success_count + error_count) > 0
+                    else 0
                 ),
-                "avg_image_size_kb": (
-                    round(stats["avg_image_size"] / 1024, 2) if stats["avg_image_size"] else 0
-                ),
-                "total_storage_mb": round((stats["total_storage_bytes"] or 0) / (1024 * 1024), 2),
-                "success_rate": round(
-                    (
-                        (success_count / (success_count + error_count) * 100)
-                        if (success_count + error_count) > 0
-                        else 0
-                    ),
-                    2,
-                ),
-            },
-            "by_dimensions": formatted_dimensions,
-            "by_mime_type": [
-                {
-                    "mime_type": m["mime_type"],
-                    "count": m["count"],
-                    "total_size_mb": round(m["total_size"] / (1024 * 1024), 2),
-                    "avg_size_kb": round(m["avg_size"] / 1024, 2),
-                }
-                for m in mime_type_stats
-            ],
-            "recent_trends": list(recent_stats),
-        }
-    )
+                2,
+            ),
+        },
+        "by_dimensions": formatted_dimensions,
+        "by_mime_type": [
+            {
+                "mime_type": m["mime_type"],
+                "count": m["count"],
+                "total_size_mb": round(m["total_size"] / (1024 * 1024), 2),
+                "avg_size_kb": round(m["avg_size"] / 1024, 2),
+            }
+            for m in mime_type_stats
+        ],
+        "recent_trends": list(recent_stats),
+    }
@@ -1,7 +1,11 @@
 #!/usr/bin/env python
 """Verify and compare July (closed) and August (current) billing periods."""
 
+import calendar
 import os
+import sys
+from collections import defaultdict
+from typing import Any
 
 import django
 
@@ -9,27 +13,46 @@ import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncDate
 
 from customers.models import ApiToken, User
-from usage.models import BillingPeriod, RequestImage, RequestLog
+from usage.models import BillingPeriod, RequestLog
 
+# Months of 2025 covered by the generated sample data
+MONTHS = (6, 7, 8)
 
-def format_status(status: str) -> str:
-    """Format payment status with color."""
-    colors = {
-        "paid": "\033[92m",  # Green
-        "pending": "\033[93m",  # Yellow
-        "overdue": "\033[91m",  # Red
-        "waived": "\033[94m",  # Blue
-    }
-    reset = "\033[0m"
-    color = colors.get(status, "")
-    return f"{color}{status.upper()}{reset}"
 
+_RESET = "\033[0m"
+_STATUS_COLORS = {
+    "paid": "\033[92m",  # Green
+    "pending": "\033[93m",  # Yellow
+    "overdue": "\033[91m",  # Red
+    "waived": "\033[94m",  # Blue
+}
+# Fully formatted labels, built once instead of on every call
+_STATUS_FMT = {
+    status: f"{color}{status.upper()}{_RESET}" for status, color in _STATUS_COLORS.items()
+}
 
-def print_period_summary(period: BillingPeriod, token_name: str) -> None:
-    """Print detailed summary for a billing period."""
+
+def format_status(status: str) -> str:
+    """Format payment status with color."""
+    formatted = _STATUS_FMT.get(status)
+    if formatted is None:
+        return f"{status.upper()}{_RESET}"
+    return formatted
+
+
+def print_period_summary(
+    period: BillingPeriod,
+    token_name: str,
+    token: ApiToken | None,
+    stats: dict[str, Any] | None,
+    daily_list: list[dict[str, Any]],
+    error_breakdown: list[dict[str, Any]],
+) -> None:
+    """Print detailed summary for a billing period from pre-fetched data."""
     print(f"\n{'='*60}")
     print(f"{period.period_label} - {period.user.email}")
     print(f"{'='*60}")
@@ -55,30 +78,23 @@ def print_period_summary(period: BillingPeriod, token_name: str) -> None:
         print(f"  - Notes: {period.payment_notes}")
 
     # API Token info
-    try:
-        token = ApiToken.objects.get(name=token_name, user=period.user, revoked_at__isnull=True)
+    if token is not None:
         print(f"\nAPI Token '{token_name}':")
         print(f"  - Prefix: {token.token_prefix}")
         print(f"  - Created: {token.created_at.strftime('%Y-%m-%d %H:%M')}")
         print(
             f"  - Last Used: {token.last_used_at.strftime('%Y-%m-%d %H:%M') if token.last_used_at else 'Never'}"
         )
-    except ApiToken.DoesNotExist:
+    else:
         print(f"\nAPI Token '{token_name}': Not found")
 
     # Request statistics
-    requests = RequestLog.objects.filter(billing_period=period)
-    total = requests.count()
+    total = stats["total"] if stats else 0
 
     if total > 0:
-        successful = requests.filter(status="success").count()
-        errors = requests.filter(status="error").count()
-        with_images = RequestImage.objects.filter(request_log__billing_period=period).count()
-
-        # Calculate averages
-        avg_duration = requests.aggregate(Avg("duration_ms"))["duration_ms__avg"]
-        avg_request_size = requests.aggregate(Avg("request_bytes"))["request_bytes__avg"]
-        avg_response_size = requests.aggregate(Avg("response_bytes"))["response_bytes__avg"]
+        successful = stats["successful"]
+        errors = stats["errors"]
+        with_images = stats["with_images"]
 
         print("\nRequest Statistics:")
         print(f"  - Total Requests: {total}")
@@ -92,26 +108,16 @@ def print_period_summary(period: BillingPeriod, token_name: str) -> None:
         )
 
         print("\nPerformance Metrics:")
-        print(f"  - Avg Duration: {avg_duration:.0f}ms")
-        print(f"  - Avg Request Size: {avg_request_size/1024:.1f}KB")
-        print(f"  - Avg Response Size: {avg_response_size/1024:.1f}KB")
+        print(f"  - Avg Duration: {stats['avg_duration']:.0f}ms")
+        print(f"  - Avg Request Size: {stats['avg_request_size']/1024:.1f}KB")
+        print(f"  - Avg Response Size: {stats['avg_response_size']/1024:.1f}KB")
 
         # Daily breakdown (first 5 days and last 5 days)
-        from django.db.models.functions import TruncDate
-
-        daily_stats = (
-            requests.annotate(date=TruncDate("request_ts"))
-            .values("date")
-            .annotate(count=Count("id"))
-            .order_by("date")
-        )
-
-        daily_list = list(daily_stats)
         if daily_list:
             print("\nDaily Request Distribution:")
             # Show first 5 days
             for stat in daily_list[:5]:
-                print(f"  - {stat['date'].strftime('%Y-%m-%d')}: {stat['count']} requests")
+                print(f"  - {stat['date'].isoformat()}: {stat['count']} requests")
 
             if len(daily_list) > 10:
                 print(f"  ... ({len(daily_list) - 10} more days)")
@@ -120,16 +126,10 @@ def print_period_summary(period: BillingPeriod, token_name: str) -> None:
             if len(daily_list) > 5:
                 for stat in daily_list[-5:]:
                     if stat not in daily_list[:5]:  # Don't repeat if already shown
-                        print(f"  - {stat['date'].strftime('%Y-%m-%d')}: {stat['count']} requests")
+                        print(f"  - {stat['date'].isoformat()}: {stat['count']} requests")
 
         # Error breakdown if any
         if errors > 0:
-            error_breakdown = (
-                requests.filter(status="error")
-                .values("error_code")
-                .annotate(count=Count("id"))
-                .order_by("-count")
-            )
             print("\nError Breakdown:")
             for error in error_breakdown:
                 print(f"  - {error['error_code']}: {error['count']} occurrences")
@@ -140,12 +140,14 @@ def main():
     print("BILLING PERIODS VERIFICATION")
     print("=" * 60)
 
-    # Get all unique users with billing periods
-    users_with_periods = User.objects.filter(
-        billing_periods__period_start__year=2025, billing_periods__period_start__month__in=[6, 7, 8]
-    ).distinct()
+    # All periods of interest in one query, users joined for the headers
+    periods = list(
+        BillingPeriod.objects.filter(period_start__year=2025, period_start__month__in=MONTHS)
+        .select_related("user")
+        .order_by("user__email", "period_start")
+    )
 
-    if not users_with_periods.exists():
+    if not periods:
         print("\nNo billing periods found for June, July, or August 2025.")
         print("Please run the generation scripts first:")
         print("  ./generate_june_data.sh")
@@ -153,63 +155,91 @@ def main():
         print("  ./generate_august_data.sh")
         return
 
-    for user in users_with_periods:
+    # Per-period statistics, daily counts, error codes and tokens, one grouped query each
+    requests = RequestLog.objects.filter(billing_period__in=periods)
+    stats_by_period = {
+        row["billing_period"]: row
+        for row in requests.values("billing_period").annotate(
+            total=Count("id"),
+            successful=Count("id", filter=Q(status="success")),
+            errors=Count("id", filter=Q(status="error")),
+            with_images=Count("saved_image"),
+            avg_duration=Avg("duration_ms"),
+            avg_request_size=Avg("request_bytes"),
+            avg_response_size=Avg("response_bytes"),
+        )
+    }
+
+    daily_by_period: defaultdict[Any, list[dict[str, Any]]] = defaultdict(list)
+    for row in (
+        requests.annotate(date=TruncDate("request_ts"))
+        .values("billing_period", "date")
+        .annotate(count=Count("id"))
+        .order_by("billing_period", "date")
+    ):
+        daily_by_period[row["billing_period"]].append(row)
+
+    errors_by_period: defaultdict[Any, list[dict[str, Any]]] = defaultdict(list)
+    for row in (
+        requests.filter(status="error")
+        .values("billing_period", "error_code")
+        .annotate(count=Count("id"))
+        .order_by("billing_period", "-count")
+    ):
+        errors_by_period[row["billing_period"]].append(row)
+
+    token_names = [calendar.month_name[month].upper() for month in MONTHS]
+    tokens = {
+        (token.user_id, token.name): token
+        for token in ApiToken.objects.filter(
+            user__in={period.user_id for period in periods},
+            name__in=token_names,
+            revoked_at__isnull=True,
+        )
+    }
+
+    periods_by_user: dict[User, dict[int, BillingPeriod]] = {}
+    for period in periods:
+        periods_by_user.setdefault(period.user, {})[period.period_start.month] = period
+
+    for user, user_periods in periods_by_user.items():
         print(f"\n\n{'#'*60}")
         print(f"USER: {user.email}")
         print(f"{'#'*60}")
 
-        # Check June period
-        try:
-            june_period = BillingPeriod.objects.get(
-                user=user, period_start__year=2025, period_start__month=6
+        for month, token_name in zip(MONTHS, token_names, strict=True):
+            period = user_periods.get(month)
+            if period is None:
+                print(f"\n{'='*60}")
+                print(f"{calendar.month_name[month]} 2025 - No data")
+                print(f"{'='*60}")
+                continue
+
+            print_period_summary(
+                period,
+                token_name,
+                tokens.get((user.id, token_name)),
+                stats_by_period.get(period.id),
+                daily_by_period[period.id],
+                errors_by_period[period.id],
             )
-            print_period_summary(june_period, "JUNE")
-        except BillingPeriod.DoesNotExist:
-            print(f"\n{'='*60}")
-            print("June 2025 - No data")
-            print(f"{'='*60}")
-
-        # Check July period
-        try:
-            july_period = BillingPeriod.objects.get(
-                user=user, period_start__year=2025, period_start__month=7
-            )
-            print_period_summary(july_period, "JULY")
-        except BillingPeriod.DoesNotExist:
-            print(f"\n{'='*60}")
-            print("July 2025 - No data")
-            print(f"{'='*60}")
-
-        # Check August period
-        try:
-            august_period = BillingPeriod.objects.get(
-                user=user, period_start__year=2025, period_start__month=8
-            )
-            print_period_summary(august_period, "AUGUST")
-        except BillingPeriod.DoesNotExist:
-            print(f"\n{'='*60}")
-            print("August 2025 - No data")
-            print(f"{'='*60}")
 
     # Summary comparison
     print(f"\n\n{'='*60}")
     print("SUMMARY COMPARISON")
     print(f"{'='*60}")
 
-    all_periods = BillingPeriod.objects.filter(
-        period_start__year=2025, period_start__month__in=[6, 7, 8]
-    ).order_by("user__email", "period_start")
-
-    if all_periods:
-        print("\nAll Billing Periods:")
-        print(f"{'User':<30} {'Period':<15} {'Status':<10} {'Current':<8} {'Total':<10}")
-        print("-" * 73)
-
-        for period in all_periods:
-            current = "Yes" if period.is_current else "No"
-            print(
-                f"{period.user.email:<30} {period.period_label:<15} {period.payment_status:<10} {current:<8} ${period.total_cost_cents/100:>8.2f}"
-            )
+    print("\nAll Billing Periods:")
+    print(f"{'User':<30} {'Period':<15} {'Status':<10} {'Current':<8} {'Total':<10}")
+    print("-" * 73)
+
+    # Format every row up front and emit the table in a single write
+    rows = [
+        f"{period.user.email:<30} {period.period_label:<15} {period.payment_status:<10} "
+        f"{'Yes' if period.is_current else 'No':<8} ${period.total_cost_cents/100:>8.2f}\n"
+        for period in periods
+    ]
+    sys.stdout.write("".join(rows))
 
     print("\n" + "=" * 60)
     print("Verification complete!")